@@ -4,47 +4,72 @@ import os
 import time
 import ctypes
 import threading
-import pyautogui
+import queue
 from tkinter import colorchooser
-import mss
-from PIL import Image
-import keyboard  # pip install keyboard
 
-ctypes.windll.user32.SetProcessDPIAware()
+from engine import DetectionEngine
+from detector import ColorRule, parse_rule, rule_to_dict
+from capture import CaptureSession
+from worker import DetectPipeline
+from scheduler import PollScheduler
+from evidence import EvidenceWriter, FrameRing, save_trigger
+from input_backend import default_backend, run_click_sequence, latency_report
+from telemetry import TickRecorder, STAGES
+from recording import SessionWriter
+from template import TemplateMatcher
+from continuous import FrameDeduper, TriggerGate
+from sequence import SequenceRunner, format_report, parse_steps, step_to_dict
+from profiles import ProfileStore
+from regions import WatchRegion, MultiCapture, parse_regions, region_to_dict
+
+# 시작 속도: DPI/해상도는 Overlay 의 Tk 로 바로 확인 (임시 Tk 를 만들었다 지우지 않음)
+# keyboard(전역 단축키)는 등록 스레드에서, PIL 은 첫 스크린샷 저장 때, mss/pyautogui 는
+# 첫 캡처/클릭 때 import 된다.
+
+def set_dpi_aware():
+    # 윈도우에서만 (다른 OS 나 오래된 윈도우면 그냥 넘어감). Tk 창을 만들기 전에 호출
+    try:
+        ctypes.windll.user32.SetProcessDPIAware()
+    except (AttributeError, OSError):
+        pass
 
 # =========================== 폰트 자동 설정 ===========================
-def get_dpi_scaling():
-    root = tk.Tk()
-    scaling = root.tk.call('tk', 'scaling')
-    root.destroy()
-    return scaling  # 1.0: 100%, 1.5: 150% 등
-
-def get_resolution():
-    user32 = ctypes.windll.user32
-    screensize = (user32.GetSystemMetrics(0), user32.GetSystemMetrics(1))
-    return screensize  # (width, height)
-
-def calc_fontsize_by_env():
-    width, height = get_resolution()
-    scaling = get_dpi_scaling()
+def get_dpi_scaling(root):
+    return root.tk.call('tk', 'scaling')  # 1.0: 100%, 1.5: 150% 등
+
+def get_resolution(root):
+    return root.winfo_screenwidth(), root.winfo_screenheight()  # (width, height)
+
+def calc_fontsize_by_env(root):
+    width, height = get_resolution(root)
+    scaling = get_dpi_scaling(root)
     # QHD 이상은 크게
     if width >= 2560 or height >= 1440:
         return 14
     else:
         return 11
 
-FONT_SIZE = calc_fontsize_by_env()
+FONT_SIZE = 11
 BASE_FONT = ("맑은 고딕", FONT_SIZE)
 BOLD_FONT = ("맑은 고딕", FONT_SIZE, "bold")
 SMALL_FONT = ("맑은 고딕", max(FONT_SIZE-2, 8))
 
+def init_fonts(root):
+    global FONT_SIZE, BASE_FONT, BOLD_FONT, SMALL_FONT
+    FONT_SIZE = calc_fontsize_by_env(root)
+    BASE_FONT = ("맑은 고딕", FONT_SIZE)
+    BOLD_FONT = ("맑은 고딕", FONT_SIZE, "bold")
+    SMALL_FONT = ("맑은 고딕", max(FONT_SIZE-2, 8))
+
 # =====================================================================
 
 class Overlay(tk.Tk):
     def __init__(self, x, y, width, height,
                  border_color="blue", border_width=4,
                  transparency_color="white", title="이길 수 없다면 합류하라"):
+        set_dpi_aware()
         super().__init__()
+        init_fonts(self)
         self.overrideredirect(True)
         self.attributes("-topmost", True)
         self.config(bg=transparency_color)
@@ -65,17 +90,100 @@ class Overlay(tk.Tk):
             self.panel_width = 325
         self.interval = 0.1
         self.tolerance = 40
+        self.second_click_delay = 0.1  # 첫 클릭 → 두 번째 클릭 간격(초)
+        self.min_blob_size = 1          # 이보다 작은(가로/세로 px) 덩어리는 무시
+        # 추가로 기다릴 색상들 (detector.ColorRule(색, 허용오차, 두번째 클릭 좌표, 이름))
+        # 예: [ColorRule((0, 200, 80), 30, (1200, 900), "초록 좌석")]
+        self.extra_rules = []
+        # 템플릿 모드: INSERT 로 마우스 주변 template_size px 패치를 떠서 색 대신 모양으로 찾음
+        # (DELETE 로 해제). 패치 가운데 색으로 먼저 거르고, 점수 template_threshold 이상만 인식
+        self.template = None
+        self.template_size = 32
+        self.template_threshold = 0.8
+        # 첫 클릭 뒤에 이어서 할 단계들 (sequence.WaitFor / Click). 비어 있으면 기존처럼
+        # 두 번째 좌표 한 번 클릭. 예: 좌석 -> 확인 버튼 뜨면 클릭 -> 결제 버튼 뜨면 클릭
+        # [WaitFor(color=(0, 200, 80), tol=30, timeout=2.0, name="확인"),
+        #  WaitFor(color=(255, 120, 0), tol=30, timeout=3.0, name="결제")]
+        self.steps = []
+        # 여러 영역 감시 (regions.WatchRegion 목록). 비어 있으면 창 아래 한 곳만 감시.
+        # 있으면 창 아래 대신 이 영역들을 영역별 색/규칙/단계로 감시 (패널의 "영역 추가"로 지금 창
+        # 위치+설정을 하나씩 넣거나 프로필에 적어 둠). tick 마다 가까운 영역끼리 묶어서 캡처
+        self.watch_regions = []
         self.running = False
+        # 연속 감시: 인식해도 멈추지 않음. 같은 화면은 분석 생략, 같은 덩어리는
+        # 사라졌다 다시 나오거나 continuous_cooldown 초가 지나야 다시 클릭
+        self.continuous = False
+        self.continuous_cooldown = 3.0
+        # 이번 감시가 연속 감시로 시작됐는지 (START 때 고정. 감시 중 체크박스는 다음 START 부터)
+        self._run_continuous = False
+        # 스크린샷은 최근 이 개수만 남기고 오래된 것부터 지움 (None = 안 지움)
+        self.max_screenshots = 200
 
         # 반복 클릭 관련 변수
         self.repeat_pos = (x + width // 2, y + height // 2)
         self.repeat_on = False
         self.repeat_interval = 1.0
-        self._repeat_job = None
+        # 인식 클릭/단계가 도는 동안 잡고 있음 -> 그 사이 반복 클릭은 건너뜀
+        # (연속 감시에서 좌석 클릭과 확인 클릭 사이에 새로고침이 끼면 안 됨)
+        self._hit_lock = threading.Lock()
+        # 반복 클릭(새로고침) 직후 몇 초 동안 간격을 절반으로 줄여 빠르게 감시
+        self.fast_poll_for = 2.0
+        # 이 시간(초) 동안 새로고침/인식이 없으면 간격 2배로 느리게 (None = 안 느려짐)
+        self.idle_slowdown_after = None
+
+        # 클릭 백엔드 (윈도우는 SendInput 직접 호출)
+        self.input = default_backend()
+        self.last_latency = None
+
+        # 캡처 세션 (mss 재사용) + 인식 엔진 (마스크 버퍼 재사용)
+        self.capture = CaptureSession()
+        # incremental: 화면이 안 바뀐 타일은 다시 안 봄 (결과는 전체 검사와 동일)
+        # scan_workers >= 2 : 4K/멀티모니터처럼 큰 영역은 band 나눠서 멀티코어로 전체 검사
+        #   (band 계산은 GIL 을 놓고 돌아서 코어 수만큼 겹친다. 코어가 1개면 직렬과 비슷하거나
+        #    조금 느림 -> 켜기 전에 bench_detect.py --workers N 으로 그 PC 에서 detect/par 비교)
+        self.scan_workers = 1
+        self.engine = DetectionEngine(self.capture, border=self.border_width,
+                                      incremental=self.scan_workers <= 1,
+                                      workers=self.scan_workers)
+        # 인식 직전 프레임 보관 개수 (0 = 끔, 1600x900 기준 1장에 약 5.8MB)
+        self.pre_trigger_frames = 0
+        self.frame_ring = FrameRing(self.pre_trigger_frames)
+        self.evidence = EvidenceWriter(maxsize=self.pre_trigger_frames + 8,
+                                       keep=self.max_screenshots)
+        # True 면 감시할 때마다 세션_시간.cprec 로 프레임 녹화 (sweep_tolerance.py 로 허용오차 고르기)
+        self.record_sessions = False
+        # tick 별 단계 시간 기록 (패널에 fps/p95 표시). 파일로도 남기려면
+        # trace_path = "ticks.jsonl" 또는 "ticks.csv"
+        self.trace_path = None
+        self.recorder = TickRecorder(path=self.trace_path)
+        # 캡처/분석은 별도 스레드에서, Tk 는 상태 이벤트만 받음
+        self.scheduler = PollScheduler(lambda: self.interval,
+                                       fast_for=self.fast_poll_for,
+                                       idle_after=self.idle_slowdown_after)
+        self.pipeline = DetectPipeline(self.capture, self._detect, self._on_hit,
+                                       lambda: self.interval, ring=self.frame_ring,
+                                       scheduler=self.scheduler, recorder=self.recorder,
+                                       timings=self._timings,
+                                       settings=self._detect_settings)
+        # 여러 영역 감시용: 묶음 캡처 + 영역별 엔진 (START 때 watch_regions 로 준비)
+        self.multi_capture = MultiCapture(self.capture)
+        self._active_regions = []
+        self._region_rules = []
+        self.region_engines = []
+        self._region_timings = {}
+        self._regions_unchanged = None
+        self.sequencer = SequenceRunner(self.capture, self.input, border=self.border_width)
+        self.last_sequence = None
+        self.deduper = FrameDeduper(probe=self._detect_unchanged)
+        self.gate = TriggerGate(self.continuous_cooldown)
+        # 설정 프로필 (profiles.json). START/종료 때 현재 프로필 이름으로 자동 저장
+        self.profiles = ProfileStore()
+        self.profile_name = "기본"
 
         self._make_title_bar(title)
         self._make_canvas()
         self._make_control_panel()
+        self._update_capture_region(x, y)
 
         # 전역 키 핸들러 (tk window용)
         self.bind_all('<Key>', self.global_key_handler)
@@ -83,8 +191,15 @@ class Overlay(tk.Tk):
         # 시스템 전역 단축키 (PageUp/CTRL+Q) - 별도 스레드에서 등록
         threading.Thread(target=self._register_global_hotkeys, daemon=True).start()
 
+        self._poll_worker()
+
     # =========================== HOTKEYS 등록 ============================
     def _register_global_hotkeys(self):
+        try:
+            import keyboard  # pip install keyboard
+        except ImportError:
+            print("keyboard 모듈이 없어서 전역 단축키(PageUp/Ctrl+Q) 없이 실행")
+            return
         keyboard.add_hotkey('page up', self._toggle_repeat_from_global)
         keyboard.add_hotkey('ctrl+q', self._emergency_stop_from_global)
 
@@ -105,10 +220,13 @@ class Overlay(tk.Tk):
             self._stop_repeat_click()
 
     def _emergency_stop_from_global(self):
+        # 감시 스레드는 Tk 를 거치지 않고 바로 멈춤
+        self.pipeline.stop()
         self.after(0, self._emergency_stop)
 
     def _emergency_stop(self):
         self.running = False
+        self.pipeline.stop()
         self.repeat_on = False
         self._stop_repeat_click()
         self._update_btn_colors()
@@ -190,6 +308,10 @@ class Overlay(tk.Tk):
         row.pack(fill="x")
         tk.Label(tol_frame, text="반복은 시작 시에 ON 가능", bg="#f6f7fa", anchor="w", fg="#2167ce", font=SMALL_FONT).pack(anchor="w", pady=(2,0))
         tk.Label(tol_frame, text="Ctrl + Q : 강제 중지", bg="#f6f7fa", anchor="w", fg="#ff2a00", font=SMALL_FONT).pack(anchor="w", pady=(2,0))
+        self.continuous_var = tk.BooleanVar(value=self.continuous)
+        self.continuous_var.trace_add('write', lambda *a: self._update_continuous())
+        tk.Checkbutton(tol_frame, text="연속 감시 (인식해도 안 멈춤)", variable=self.continuous_var, bg="#f6f7fa", activebackground="#f6f7fa", anchor="w", font=SMALL_FONT).pack(anchor="w", pady=(2,0))
+        tk.Label(tol_frame, text="INSERT : 마우스 주변 모양 인식 / DELETE : 해제", bg="#f6f7fa", anchor="w", fg="#2167ce", font=SMALL_FONT).pack(anchor="w", pady=(2,0))
 
         # ── 나머지(구분선/색상/좌표/간격/허용오차 등) ────────────
         sep = tk.Frame(self.panel, height=2, bg="#e1e2e3")
@@ -233,9 +355,37 @@ class Overlay(tk.Tk):
         self.tol_var = tk.IntVar(value=self.tolerance)
         self.tol_var.trace_add('write', lambda *a: self._update_tolerance())
         tk.Entry(row, width=6, textvariable=self.tol_var, justify="center", bg="white", font=BASE_FONT).pack(side="left", padx=(8,0))
+        tk.Label(row, text="최소(px)", bg="#f6f7fa", anchor="w", font=BASE_FONT).pack(side="left", padx=(8,0))
+        self.min_size_var = tk.IntVar(value=self.min_blob_size)
+        self.min_size_var.trace_add('write', lambda *a: self._update_min_size())
+        tk.Entry(row, width=4, textvariable=self.min_size_var, justify="center", bg="white", font=BASE_FONT).pack(side="left", padx=(8,0))
         tk.Label(tol_frame2, text="80까지 정도만 추천", bg="#f6f7fa", anchor="w", fg="#2167ce", font=SMALL_FONT).pack(anchor="w", pady=(2,0))
         tk.Label(tol_frame2, text="배경이 투명이라 설정 바꿀 때\n숫자만 클릭 잘 해야함", bg="#f6f7fa", anchor="w", fg="#000000", font=SMALL_FONT, justify="left").pack(anchor="w", pady=(2,0))
 
+        # ── 프로필 (이름 + 저장/불러오기) ────────────
+        profile_frame = tk.Frame(self.panel, bg="#f6f7fa")
+        profile_frame.pack(pady=(4, 0), padx=10, fill="x")
+        tk.Label(profile_frame, text="프로필", bg="#f6f7fa", anchor="w", font=BASE_FONT).pack(side="left")
+        self.profile_var = tk.StringVar(value=self.profile_name)
+        tk.Entry(profile_frame, width=8, textvariable=self.profile_var, justify="center", bg="white", font=BASE_FONT).pack(side="left", padx=(8, 3))
+        tk.Button(profile_frame, text="저장", command=self._save_profile_from_ui, bg="#eaf0fa", bd=0, relief="ridge", font=SMALL_FONT).pack(side="left", padx=(0, 3))
+        tk.Button(profile_frame, text="불러오기", command=self._load_profile_from_ui, bg="#eaf0fa", bd=0, relief="ridge", font=SMALL_FONT).pack(side="left")
+
+        # ── 감시 영역 (지금 창 아래 + 지금 설정을 하나씩 추가) ────────────
+        region_frame = tk.Frame(self.panel, bg="#f6f7fa")
+        region_frame.pack(pady=(4, 0), padx=10, fill="x")
+        tk.Label(region_frame, text="영역", bg="#f6f7fa", anchor="w", font=BASE_FONT).pack(side="left")
+        tk.Button(region_frame, text="추가", command=self._add_watch_region, bg="#eaf0fa", bd=0, relief="ridge", font=SMALL_FONT).pack(side="left", padx=(8, 3))
+        tk.Button(region_frame, text="비우기", command=self._clear_watch_regions, bg="#eaf0fa", bd=0, relief="ridge", font=SMALL_FONT).pack(side="left", padx=(0, 6))
+        self.region_var = tk.StringVar()
+        tk.Label(region_frame, textvariable=self.region_var, bg="#f6f7fa", anchor="w", fg="#2167ce", font=SMALL_FONT).pack(side="left")
+        self._update_region_label()
+
+        # ── 성능 표시 (감시 중 0.5초마다 갱신) ────────────
+        self.perf_var = tk.StringVar(value="fps -  |  분석 p95 -  |  클릭 p95 -")
+        tk.Label(self.panel, textvariable=self.perf_var, bg="#f6f7fa", anchor="w", fg="#666666", font=SMALL_FONT).pack(anchor="w", padx=10, pady=(4,0))
+        self._perf_next = 0.0
+
         # 바인딩 변수 연결
         self.rep_x_var.trace_add('write', lambda *a: self._update_repeat_pos())
         self.rep_y_var.trace_add('write', lambda *a: self._update_repeat_pos())
@@ -252,6 +402,12 @@ class Overlay(tk.Tk):
         elif event.keysym == 'Next':
             self._set_repeat_pos(event)
             return "break"
+        elif event.keysym == 'Insert':
+            self._capture_template_from_mouse(event)
+            return "break"
+        elif event.keysym == 'Delete':
+            self._clear_template()
+            return "break"
 
     def _update_btn_colors(self):
         if self.running:
@@ -283,6 +439,25 @@ class Overlay(tk.Tk):
         try:    self.tolerance = self.tol_var.get()
         except: pass
 
+    def _update_min_size(self):
+        try:    self._apply_min_size(self.min_size_var.get())
+        except: pass
+
+    def _apply_min_size(self, size):
+        # 가로/세로 size px 미만 덩어리는 무시. 4px 이상이면 그 간격으로 성긴 탐색
+        self.min_blob_size = max(int(size), 1)
+        self.engine.min_size = self.min_blob_size
+        self.engine.stride = self.min_blob_size if self.min_blob_size >= 4 else 1
+
+    def _update_continuous(self):
+        try:
+            self.continuous = bool(self.continuous_var.get())
+        except tk.TclError:
+            return
+        # 감시 중에 바꾸면 다음 START 부터 적용
+        if self.running:
+            print("연속 감시 설정은 다음 START 부터 적용")
+
     def _update_second_click(self):
         try:    self.second_click_pos = (self.x_var.get(), self.y_var.get())
         except: pass
@@ -298,21 +473,38 @@ class Overlay(tk.Tk):
         except: pass
 
     def _capture_mouse_position(self, e):
-        x,y = pyautogui.position()
+        x,y = self.input.position()
         self.x_var.set(x); self.y_var.set(y)
 
     def _capture_color_from_mouse(self, e):
-        x, y = pyautogui.position()
-        with mss.mss() as sct:
-            mon = {"left": x, "top": y, "width": 1, "height": 1}
-            sct_img = sct.grab(mon)
-            img = Image.frombytes("RGB", sct_img.size, sct_img.rgb)
-            r, g, b = img.getpixel((0, 0))
+        x, y = self.input.position()
+        r, g, b = self.capture.grab_pixel(x, y)
         color_hex = '#%02x%02x%02x' % (r, g, b)
         self.hex_var.set(color_hex)
 
+    def _capture_template_from_mouse(self, e):
+        # HOME 스포이드처럼 마우스 위치 기준, 주변 template_size px 를 기준 패치로
+        x, y = self.input.position()
+        size = self.template_size
+        mon = {"left": x - size // 2, "top": y - size // 2, "width": size, "height": size}
+        patch = self.capture.grab(mon).copy()
+        try:
+            self.template = TemplateMatcher(patch, self.template_threshold,
+                                            prefilter="center", prefilter_tol=self.tolerance)
+        except ValueError as err:
+            print(f"템플릿 실패: {err}")
+            return
+        self.evidence.submit(patch, "템플릿.png")
+        print(f"템플릿 설정: ({x}, {y}) 주변 {size}px, 사전 필터 색 #%02x%02x%02x"
+              % self.template.prefilter)
+
+    def _clear_template(self):
+        if self.template is not None:
+            self.template = None
+            print("템플릿 해제 (색상 모드)")
+
     def _set_repeat_pos(self, e):
-        x, y = pyautogui.position()
+        x, y = self.input.position()
         self.rep_x_var.set(x)
         self.rep_y_var.set(y)
         self.repeat_pos = (x, y)
@@ -330,16 +522,26 @@ class Overlay(tk.Tk):
             self.repeat_interval = self.repeat_interval_var.get()
         except: pass
 
+    # 반복 클릭은 캡처 스레드의 스케줄러가 인식과 같은 박자 타임라인에서 실행
     def _start_repeat_click(self):
         if not self.repeat_on or not self.running:
             return
-        pyautogui.click(self.repeat_pos)
-        self._repeat_job = self.after(int(self.repeat_interval * 1000), self._start_repeat_click)
+        self.pipeline.set_repeat(self._repeat_click, lambda: self.repeat_interval)
 
     def _stop_repeat_click(self):
-        if self._repeat_job:
-            self.after_cancel(self._repeat_job)
-            self._repeat_job = None
+        self.pipeline.set_repeat(None, None)
+
+    def _repeat_click(self):
+        # 캡처 스레드에서 호출됨. 클릭 안 했으면 False (빠른 감시로 안 바꿈)
+        if not (self.repeat_on and self.running):
+            return False
+        if not self._hit_lock.acquire(blocking=False):
+            return False
+        try:
+            self.input.click(*self.repeat_pos)
+        finally:
+            self._hit_lock.release()
+        return True
 
     def _draw_border(self):
         self.canvas.delete("all")
@@ -354,13 +556,23 @@ class Overlay(tk.Tk):
             width=self.border_width
         )
 
+    # 캔버스(감시 영역)의 화면 좌표를 캡처 세션에 반영 - 이동/크기 변경 시에만 호출
+    def _update_capture_region(self, x0=None, y0=None):
+        if x0 is None:
+            x0, y0 = self.winfo_rootx(), self.winfo_rooty()
+        self.capture.set_region(x0, y0 + self.title_bar_height,
+                                self.width - self.panel_width,
+                                self.height - self.title_bar_height)
+
     def start_move(self, e):
         self._drag_x, self._drag_y = e.x, e.y
         self._resizing = False
 
     def on_move(self, e):
         if not getattr(self, "_resizing", False):
-            self.geometry(f"+{e.x_root - self._drag_x}+{e.y_root - self._drag_y}")
+            x0, y0 = e.x_root - self._drag_x, e.y_root - self._drag_y
+            self.geometry(f"+{x0}+{y0}")
+            self._update_capture_region(x0, y0)
             if hasattr(self, "panel"):
                 self.panel.place(x=self.width - self.panel_width, y=self.title_bar_height)
 
@@ -378,14 +590,17 @@ class Overlay(tk.Tk):
             dx,dy = e.x_root - self._start_x, e.y_root - self._start_y
             nw = max(300, self._start_w + dx)
             nh = max(self.title_bar_height + 100, self._start_h + dy)
-            self.width, self.height = nw, nh
-            x0, y0 = self.winfo_rootx(), self.winfo_rooty()
-            self.geometry(f"{nw}x{nh}+{x0}+{y0}")
-            self.canvas.config(width=nw-self.panel_width,
-                               height=nh-self.title_bar_height)
-            self._draw_border()
-            if hasattr(self, "panel"):
-                self.panel.place(x=self.width - self.panel_width, y=self.title_bar_height)
+            self._set_geometry(self.winfo_rootx(), self.winfo_rooty(), nw, nh)
+
+    def _set_geometry(self, x0, y0, nw, nh):
+        self.width, self.height = nw, nh
+        self.geometry(f"{nw}x{nh}+{x0}+{y0}")
+        self.canvas.config(width=nw-self.panel_width,
+                           height=nh-self.title_bar_height)
+        self._draw_border()
+        self._update_capture_region(x0, y0)
+        if hasattr(self, "panel"):
+            self.panel.place(x=self.width - self.panel_width, y=self.title_bar_height)
 
     def on_motion(self, e):
         x,y = e.x, e.y
@@ -397,115 +612,374 @@ class Overlay(tk.Tk):
         else:                                                       c="arrow"
         self.canvas.config(cursor=c)
 
-    # ---- 덩어리별 Blob 인식 & 중앙 클릭 ----
-    def find_color_inside(self, color, tol=0):
-        from collections import deque
-
-        cx = self.canvas.winfo_rootx()
-        cy = self.canvas.winfo_rooty()
-        cw = self.canvas.winfo_width()
-        ch = self.canvas.winfo_height()
-
-        with mss.mss() as sct:
-            mon = {"left": cx, "top": cy, "width": cw, "height": ch}
-            sct_img = sct.grab(mon)
-            img = Image.frombytes("RGB", sct_img.size, sct_img.rgb)
-
-        pix = img.load()
-        visited = [[False]*ch for _ in range(cw)]
-        blobs = []
-
-        border = self.border_width
-
-        # 모든 색상 픽셀 방문, 그룹화(BFS)
-        for i in range(border, cw - border):
-            for j in range(border, ch - border):
-                if visited[i][j]:
-                    continue
-                r, g, b = pix[i, j]
-                if (abs(r - color[0]) <= tol and
-                    abs(g - color[1]) <= tol and
-                    abs(b - color[2]) <= tol):
-                    queue = deque()
-                    queue.append((i, j))
-                    group = []
-                    visited[i][j] = True
-                    while queue:
-                        x, y = queue.popleft()
-                        group.append((x, y))
-                        for dx, dy in [(-1,0),(1,0),(0,-1),(0,1)]:
-                            nx, ny = x+dx, y+dy
-                            if 0 <= nx < cw and 0 <= ny < ch and not visited[nx][ny]:
-                                rr, gg, bb = pix[nx, ny]
-                                if (abs(rr - color[0]) <= tol and
-                                    abs(gg - color[1]) <= tol and
-                                    abs(bb - color[2]) <= tol):
-                                    queue.append((nx, ny))
-                                    visited[nx][ny] = True
-                    blobs.append(group)
-
-        if not blobs:
-            return None
-
-        # 각 blob의 top-left(가장 위, 왼쪽)와 중앙좌표 구하기
-        blob_infos = []
-        for group in blobs:
-            min_y = min(p[1] for p in group)
-            lefts_in_min_y = [p[0] for p in group if p[1]==min_y]
-            min_x = min(lefts_in_min_y)
-            xs = [p[0] for p in group]
-            ys = [p[1] for p in group]
-            center_x = (min(xs) + max(xs)) // 2
-            center_y = (min(ys) + max(ys)) // 2
-            blob_infos.append({
-                'group': group,
-                'top_left': (min_x, min_y),
-                'center': (center_x, center_y)
-            })
-
-        # 가장 위, 왼쪽에 있는 blob 선택 (y→x순)
-        blob_infos.sort(key=lambda b: (b['top_left'][1], b['top_left'][0]))
-        target_blob = blob_infos[0]
-        center_x, center_y = target_blob['center']
-
-        return (cx + center_x, cy + center_y)
-
-    def monitor(self):
-        if not self.running:
-            return
-        pos = self.find_color_inside(self.target_color, tol=self.tolerance)
-        if pos:
+    # ---- 덩어리별 Blob 인식 & 중앙 클릭 (실제 처리는 engine.DetectionEngine) ----
+    def _detect_settings(self):
+        # 이 값이 그대로고 화면도 그대로면 분석을 건너뜀 (연속 감시)
+        return (self.target_color, self.tolerance, self.engine.min_size, self.engine.stride,
+                id(self.template), tuple(self.extra_rules), tuple(self._active_regions))
+
+    def _timings(self):
+        return self._region_timings if self._active_regions else self.engine.timings
+
+    def _detect_unchanged(self):
+        # 방금 분석이 화면 변화 없이 끝났는지 (incremental 경로가 아니었으면 None -> crc 로 비교)
+        return self._regions_unchanged if self._active_regions else self.engine.unchanged
+
+    # ---- 아래 두 함수는 분석 스레드에서 호출됨 (Tk 위젯 건드리지 말 것) ----
+    def _detect(self, frame, mon):
+        if isinstance(frame, tuple):
+            return self._detect_regions(frame)
+        template = self.template
+        if template is not None:
+            return self.engine.detect(frame, mon, template=template)
+        if self.extra_rules:
+            # 화면의 색상/허용오차 + 추가 규칙들을 한 번에 매칭
+            rules = [ColorRule(self.target_color, self.tolerance)] + list(self.extra_rules)
+            return self.engine.detect(frame, mon, rules=rules)
+        return self.engine.detect(frame, mon, self.target_color, self.tolerance)
+
+    def _detect_regions(self, frames):
+        # 영역 순서대로 보고 처음 인식된 영역의 결과 (앞에 있는 영역이 우선)
+        timings = {}
+        hit = None
+        unchanged = True
+        for rf in frames:
+            watch = self._active_regions[rf.index]
+            engine = self.region_engines[rf.index]
+            hit = engine.detect(rf.frame, rf.mon, watch.color, watch.tol,
+                                self._region_rules[rf.index], watch.template)
+            for k, v in engine.timings.items():
+                timings[k] = timings.get(k, 0.0) + v
+            if unchanged is not None:
+                unchanged = None if engine.unchanged is None else unchanged and engine.unchanged
+            if hit is not None:
+                hit = hit._replace(region=watch.name)
+                break
+        self._region_timings = timings
+        self._regions_unchanged = unchanged
+        return hit
+
+    def _on_hit(self, hit, frame, mon, t_grab, tick=None):
+        # 분석 스레드에서 호출됨. 진행 중인 반복 클릭이 있으면 끝나길 기다렸다가 시작
+        with self._hit_lock:
+            return self._handle_hit(hit, frame, mon, t_grab, tick)
+
+    def _handle_hit(self, hit, frame, mon, t_grab, tick=None):
+        # 반복 클릭 먼저 끊기 (Tk 쪽 타이머는 hit 이벤트 받고 정리). 연속 감시면 계속 반복
+        if not self._run_continuous:
             self.repeat_on = False
-            self._stop_repeat_click()
-            self._update_btn_colors()
 
-            with mss.mss() as sct:
-                mon = {
-                    "left": self.canvas.winfo_rootx(),
-                    "top": self.canvas.winfo_rooty(),
-                    "width": self.canvas.winfo_width(),
-                    "height": self.canvas.winfo_height()
-                }
-                sct_img = sct.grab(mon)
-                img = Image.frombytes("RGB", sct_img.size, sct_img.rgb)
-                timestamp = time.strftime("%Y%m%d_%H%M%S")
-                img.save(f"찰칵_{timestamp}.png")
-                print(f"스크린샷 저장됨: 찰칵_{timestamp}.png")
-            print(f"Detected at {pos}, clicking…")
-            pyautogui.click(pos)
-            self.after(int(self.interval),
-                    lambda: pyautogui.click(*self.second_click_pos))
-            self.running = False
+        # 규칙에 두 번째 클릭 좌표가 있으면 그걸로
+        pos = hit.pos
+        second = self.second_click_pos
+        if hit.rule is not None and hit.rule.action is not None:
+            second = hit.rule.action
+
+        # 클릭이 먼저, 스크린샷은 인식에 쓴 프레임 그대로 백그라운드 저장
+        # 단계(steps)가 있으면 두 번째 좌표 대신 단계들을 이 스레드에서 바로 이어서 실행
+        # 여러 영역 감시면 그 영역의 단계만 (단계가 없으면 맞은 규칙의 두 번째 좌표, 그것도 없으면
+        # 첫 클릭만), 스크린샷도 그 영역만
+        t_detect = time.perf_counter()
+        steps = list(self.steps)
+        clicks = [(0, *pos)]
+        ring = self.frame_ring
+        if hit.region is not None:
+            index = next(k for k, w in enumerate(self._active_regions) if w.name == hit.region)
+            steps = list(self._active_regions[index].steps)
+            rf = next(rf for rf in frame if rf.index == index)
+            frame, mon, ring = rf.frame, rf.mon, None
+            if not steps and hit.rule is not None and hit.rule.action is not None:
+                clicks.append((self.second_click_delay, *hit.rule.action))
+        elif not steps:
+            clicks.append((self.second_click_delay, *second))
+        click_times = run_click_sequence(self.input, clicks, stop=self.pipeline.stop_event)
+        save_trigger(self.evidence, frame, t_grab, ring)
+        if steps and click_times:
+            self.last_sequence = self.sequencer.run(steps, region=mon,
+                                                    stop=self.pipeline.stop_event,
+                                                    t_start=click_times[0])
+
+        self.last_latency = latency_report(t_grab, t_detect, click_times)
+        if tick is not None and click_times:
+            tick["click_ms"] = (click_times[-1] - click_times[0]) * 1000
+            tick["detect_to_click_ms"] = self.last_latency["detect_to_click_ms"]
+            tick["grab_to_click_ms"] = self.last_latency["grab_to_click_ms"]
+        if click_times:
+            gaps = ", ".join(f"{g:.1f}" for g in self.last_latency["gaps_ms"])
+            rule = f" <{hit.region}>" if hit.region is not None else ""
+            rule += f" [{hit.rule.name or hit.rule.color}]" if hit.rule is not None else ""
+            if hit.score is not None:
+                rule += f" [템플릿 {hit.score:.2f}]"
+            print(f"Detected at {pos}{rule}, clicked  "
+                  f"(분석 {self.last_latency['analyze_ms']:.1f}ms, "
+                  f"인식→클릭 {self.last_latency['detect_to_click_ms']:.2f}ms, "
+                  f"클릭 간격 [{gaps}]ms)")
+        if steps and self.last_sequence is not None:
+            print("단계 (첫 클릭 기준):\n" + format_report(self.last_sequence))
+
+        # 인식 후, 자동 종료 (연속 감시면 계속)
+        self.running = self._run_continuous
+        return self.running
+
+    # ---- Tk 쪽: 파이프라인 이벤트만 받아서 화면 갱신 ----
+    def _poll_worker(self):
+        changed = False
+        while True:
+            try:
+                kind, value, run = self.pipeline.events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "error":
+                print(value)
+            # stop 직후 바로 다시 start 한 경우 이전 감시의 이벤트는 무시
+            # (안 그러면 이전 스레드의 stopped 가 새 감시의 녹화를 끊음)
+            if run != self.pipeline.run_id:
+                continue
+            changed = True
+            if kind == "hit" and not self._run_continuous:
+                self._stop_repeat_click()
+            if kind in ("stopped", "error"):
+                self.running = self.pipeline.running
+                if kind == "stopped":
+                    self._print_poll_stats()
+                    self._update_perf_label()
+                    self._stop_recording()
+        if changed:
             self._update_btn_colors()
+        now = time.perf_counter()
+        if self.running and now >= self._perf_next:
+            self._perf_next = now + 0.5
+            self._update_perf_label()
+        self.after(30, self._poll_worker)
+
+    def _update_perf_label(self):
+        st = self.recorder.summary()
+        fps = f"{st['fps']:.1f}" if st["fps"] else "-"
+        detect = f"{st['detect']['p95']:.1f}ms" if "detect" in st else "-"
+        click = f"{st['detect_to_click']['p95']:.2f}ms" if "detect_to_click" in st else "-"
+        self.perf_var.set(f"fps {fps}  |  분석 p95 {detect}  |  클릭 p95 {click}")
+
+    def _print_poll_stats(self):
+        st = self.scheduler.stats()["detect"]
+        if st and st["period_ms"] is not None:
+            print(f"감시 주기 {st['period_ms']:.1f}ms, 지터 {st['jitter_ms']:.2f}ms, "
+                  f"늦음 p95 {st['late_p95_ms']:.2f}ms, 놓친 박자 {st['missed']}/{st['ticks']}")
+        st = self.recorder.summary()
+        parts = [f"{s} {st[s]['p50']:.2f}/{st[s]['p95']:.2f}" for s in STAGES if s in st]
+        if parts:
+            print("단계별 p50/p95(ms): " + ", ".join(parts))
+        if self.pipeline.gate is not None:
+            print(f"연속 감시: 클릭 {self.gate.fired}번, 같은 덩어리 무시 {self.gate.suppressed}번, "
+                  f"같은 화면 분석 생략 {self.deduper.skipped}번")
+
+    def _start_recording(self):
+        self._stop_recording()
+        path = f"세션_{time.strftime('%Y%m%d_%H%M%S')}.cprec"
+        self.pipeline.tape = SessionWriter(path, region=self.capture.region)
+        print(f"녹화 시작: {path}")
+
+    def _stop_recording(self):
+        tape, self.pipeline.tape = self.pipeline.tape, None
+        if tape is not None:
+            tape.close()
+            print(f"녹화 종료: {tape.path} ({tape.written}장, 같은 화면 {tape.skipped}장 생략, "
+                  f"버림 {tape.dropped}장)")
+
+    # ---- 프로필 ----
+    def snapshot(self):
+        # 다시 켰을 때 그대로 감시를 이어갈 수 있는 설정 전부 (템플릿 패치는 제외)
+        steps = []
+        for step in self.steps:
+            try:
+                steps.append(step_to_dict(step))
+            except ValueError:
+                pass
+        return {
+            "geometry": [self.winfo_rootx(), self.winfo_rooty(), self.width, self.height],
+            "target_color": self._hex(),
+            "tolerance": self.tolerance,
+            "min_blob_size": self.min_blob_size,
+            "interval": self.interval,
+            "second_click_pos": list(self.second_click_pos),
+            "second_click_delay": self.second_click_delay,
+            "repeat_pos": list(self.repeat_pos),
+            "repeat_interval": self.repeat_interval,
+            "continuous": self.continuous,
+            "continuous_cooldown": self.continuous_cooldown,
+            "extra_rules": [rule_to_dict(r) for r in self.extra_rules],
+            "steps": steps,
+            "watch_regions": [region_to_dict(w) for w in self.watch_regions],
+        }
+
+    def apply_profile(self, profile, name=None):
+        # 화면 입력칸(var)을 통해 넣어서 trace 로 내부 값과 UI 가 같이 바뀜
+        # 항목별로 따로 적용: 잘못된 항목은 건너뛰고(기존 값 유지) 상태 줄에 표시 -> 시작은 계속됨
+        p = profile
+        if name is not None:
+            self.profile_name = name
+            self.profile_var.set(name)
+        if not isinstance(p, dict):
+            print(f"프로필 형식이 잘못됨: {name}")
+            self.perf_var.set("프로필 형식이 잘못됨")
+            return False
+        bad = []
+
+        def section(key, apply):
+            if key not in p:
+                return
+            try:
+                apply(p[key])
+            except (KeyError, IndexError, TypeError, ValueError) as e:
+                bad.append(key)
+                print(f"프로필 항목 무시: {key} ({e})")
+
+        def set_pair(xv, yv):
+            def apply(v):
+                x, y = v
+                xv.set(x)
+                yv.set(y)
+            return apply
+
+        def set_extra_rules(v):
+            self.extra_rules = [parse_rule(r) for r in v]
+
+        def set_steps(v):
+            self.steps = parse_steps(v)
+
+        def set_watch_regions(v):
+            self.watch_regions = parse_regions(v)
+            self._update_region_label()
+
+        def set_attr(attr):
+            return lambda v: setattr(self, attr, float(v))
+
+        section("geometry", lambda v: self._set_geometry(*v))
+        section("target_color", self.hex_var.set)
+        section("tolerance", self.tol_var.set)
+        section("min_blob_size", self.min_size_var.set)
+        section("interval", self.int_var.set)
+        section("second_click_pos", set_pair(self.x_var, self.y_var))
+        section("repeat_pos", set_pair(self.rep_x_var, self.rep_y_var))
+        section("repeat_interval", self.repeat_interval_var.set)
+        section("continuous", self.continuous_var.set)
+        section("second_click_delay", set_attr("second_click_delay"))
+        section("continuous_cooldown", set_attr("continuous_cooldown"))
+        section("extra_rules", set_extra_rules)
+        section("steps", set_steps)
+        section("watch_regions", set_watch_regions)
+        if bad:
+            self.perf_var.set(f"프로필 항목 무시: {', '.join(bad)}")
+        return not bad
+
+    def save_profile(self, name=None):
+        name = name or self.profile_name
+        try:
+            self.profiles.save(name, self.snapshot())
+        except OSError as e:
+            print(f"프로필 저장 실패: {name} ({e})")
+            return False
+        self.profile_name = name
+        return True
+
+    def load_profile(self, name=None):
+        # 이름이 없으면 마지막으로 쓴 프로필. 설정 + 창 위치/크기를 한 번에 복원
+        name = name or self.profiles.last
+        profile = self.profiles.load(name) if name else None
+        if profile is None:
+            return False
+        self.apply_profile(profile, name)
+        return True
+
+    def _save_profile_from_ui(self):
+        name = self.profile_var.get().strip()
+        if name and self.save_profile(name):
+            print(f"프로필 저장: {name}")
+
+    def _load_profile_from_ui(self):
+        name = self.profile_var.get().strip()
+        if self.running:
+            print("감시 중에는 프로필을 바꿀 수 없음")
+        elif name and self.load_profile(name):
+            print(f"프로필 불러옴: {name}")
+        else:
+            print(f"프로필 없음: {name} (있는 것: {', '.join(self.profiles.names()) or '-'})")
+
+    # ---- 여러 영역 감시 ----
+    def _add_watch_region(self):
+        # 지금 창 아래 영역 + 지금 색/허용오차/규칙/템플릿/단계를 영역 하나로
+        if self.running:
+            print("감시 중에는 영역을 바꿀 수 없음")
+            return
+        self._update_capture_region()
+        names = {w.name for w in self.watch_regions}
+        k = len(self.watch_regions) + 1
+        while f"영역{k}" in names:
+            k += 1
+        watch = WatchRegion(f"영역{k}", dict(self.capture.region), self.target_color,
+                            self.tolerance, list(self.extra_rules) or None, self.template,
+                            tuple(self.steps))
+        self.watch_regions.append(watch)
+        self._update_region_label()
+        print(f"감시 영역 추가: {watch.name} {watch.region}")
+
+    def _clear_watch_regions(self):
+        if self.running:
+            print("감시 중에는 영역을 바꿀 수 없음")
+            return
+        self.watch_regions = []
+        self._update_region_label()
+
+    def _update_region_label(self):
+        n = len(self.watch_regions)
+        self.region_var.set(f"{n}곳 (창 아래 대신)" if n else "창 아래 1곳")
+
+    def _prepare_regions(self):
+        # 영역 목록이 있으면 묶음 캡처로, 없으면 창 아래 한 곳만 (기존 경로)
+        for engine in self.region_engines:
+            engine.close()
+        self._active_regions = list(self.watch_regions)
+        # 추가 규칙이 있는 영역은 _detect 와 같이 영역 색상/허용오차 + 추가 규칙을 한 번에 매칭
+        self._region_rules = [[ColorRule(w.color, w.tol)] + list(w.rules) if w.rules else None
+                              for w in self._active_regions]
+        if not self._active_regions:
+            self.region_engines = []
+            self.pipeline.capture = self.capture
+            self.pipeline.ring = self.frame_ring
             return
-        self.after(int(self.interval*1000), self.monitor)
+        plan = self.multi_capture.set_regions([w.region for w in self._active_regions])
+        # 영역은 창 아래에서 떠 온 것이라 창을 마지막 영역 위에 두면 파란 테두리가 그 가장자리에 걸침
+        # -> 창 아래 한 곳 모드와 같이 가장자리 border_width 는 안 봄
+        self.region_engines = [DetectionEngine(border=self.border_width, incremental=True,
+                                               min_size=self.engine.min_size)
+                               for _ in self._active_regions]
+        self.pipeline.capture = self.multi_capture
+        self.pipeline.ring = None  # 직전 프레임 보관은 창 아래 한 곳 모드에서만
+        print(f"감시 영역 {len(self._active_regions)}곳 -> tick 당 캡처 {len(plan)}번, "
+              f"{self.multi_capture.pixels:,}px")
 
     def start_monitor(self):
         if not self.running:
+            # 이전 감시 스레드가 끝나기 전에 엔진/영역을 바꾸지 않도록 먼저 기다림 (보통 한 프레임)
+            if not self.pipeline.wait_stopped():
+                print("이전 감시가 아직 안 끝남. 잠시 후 다시 START")
+                return
+            # 비정상 종료 후 다시 켜도 바로 이어갈 수 있게 지금 설정을 먼저 저장
+            self.save_profile()
             self.running = True
             self._update_btn_colors()
+            self._update_capture_region()
+            self._prepare_regions()
+            self.frame_ring.clear()
+            self._run_continuous = self.continuous
+            self.gate.cooldown = self.continuous_cooldown
+            self.pipeline.dedupe = self.deduper if self._run_continuous else None
+            self.pipeline.gate = self.gate if self._run_continuous else None
+            if self.record_sessions and self._active_regions:
+                print("여러 영역 감시는 녹화 안 됨")
+            elif self.record_sessions:
+                self._start_recording()
             print("=== 스타또 ===")
-            self.monitor()
+            self.pipeline.start()
             # 반복 on상태면 반복도 같이 시작
             if self.repeat_on:
                 self._start_repeat_click()
@@ -513,16 +987,46 @@ class Overlay(tk.Tk):
     def stop_monitor(self):
         if self.running:
             self.running = False
+            self.pipeline.stop()
             self._update_btn_colors()
             self._stop_repeat_click()
             print("=== 스또푸 ===")
 
     def close_app(self):
+        self.save_profile()
         self.running = False
         self._stop_repeat_click()
+        self.pipeline.stop()
+        self.pipeline.join(0.5)
+        self._stop_recording()
+        self.capture.close()
+        self.engine.close()
+        for engine in self.region_engines:
+            engine.close()
+        self.evidence.close()
+        self.recorder.close()
         self.destroy()
         sys.exit()
 
 if __name__ == "__main__":
-    app = Overlay(500, 500, 900, 600)
+    # python auto_clicker.py [프로필 이름] [--start]
+    # 이름이 없으면 마지막으로 쓴 프로필, --start 면 불러오자마자 감시 시작
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    store = ProfileStore()
+    name = args[0] if args else store.last
+    profile = store.load(name) if name else None
+    try:
+        x, y, w, h = (int(v) for v in profile["geometry"])
+    except (KeyError, TypeError, ValueError):
+        x, y, w, h = 500, 500, 900, 600
+    app = Overlay(x, y, w, h)
+    if profile is not None:
+        app.apply_profile(profile, name)
+        print(f"프로필 불러옴: {name}")
+    elif args:
+        app.profile_name = name
+        app.profile_var.set(name)
+    if "--start" in sys.argv[1:]:
+        app.update()  # 창이 실제로 뜬 뒤의 위치로 감시 영역 계산
+        app.start_monitor()
     app.mainloop()
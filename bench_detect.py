@@ -0,0 +1,233 @@
+import argparse
+import itertools
+import json
+import platform
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import numpy as np
+
+from detector import frame_from_grab, match_mask, ColorMatcher, label_blobs, find_top_left_blob
+from engine import DetectionEngine
+
+# =========================== 인식 경로 벤치마크 ===========================
+# 합성 프레임(HD/QHD/4K, blob 개수/크기, 노이즈, 허용오차)으로 단계별 시간을 잰다.
+#   convert : mss 버퍼 -> 배열 (frame_from_grab)
+#   mask    : 허용오차 마스크 (ColorMatcher.match)
+#   label   : 전체 blob 라벨링 (label_blobs)
+#   select  : 가장 위/왼쪽 blob 만 (find_top_left_blob, 조기 종료)
+#   detect  : 엔진 한 번 (convert + mask + select) -> fps
+#   detect_par : --workers N 일 때 band 병렬 엔진 한 번
+#
+#   python bench_detect.py                          # 기본 조합, bench_results.json 저장
+#   python bench_detect.py --sizes 4K --tols 20 80 --out after.json --compare before.json
+#   python bench_detect.py --legacy --sizes 800x450 # 예전 픽셀 루프와 비교
+
+SIZES = {
+    "HD": (1280, 720),
+    "FHD": (1920, 1080),
+    "QHD": (2560, 1440),
+    "4K": (3840, 2160),
+}
+TARGET = (255, 0, 0)
+BORDER = 4
+
+
+def parse_size(name):
+    if name in SIZES:
+        return SIZES[name]
+    w, h = name.lower().split("x")
+    return int(w), int(h)
+
+
+def make_grab(width, height, color=TARGET, blobs=5, blob_size=20, noise=0.0, seed=0):
+    # mss ScreenShot 흉내 (raw = BGRA bytearray)
+    # 배경은 목표색과 먼 회색 그라데이션, 그 위에 blob(정사각형) + 무작위 노이즈 픽셀
+    rng = np.random.default_rng(seed)
+    frame = np.empty((height, width, 4), dtype=np.uint8)
+    grad = (np.arange(width) * 96 // max(width, 1) + 80).astype(np.uint8)
+    frame[..., :3] = grad[None, :, None]
+    frame[..., 3] = 255
+    r, g, b = color
+    for _ in range(blobs):
+        y0 = int(rng.integers(0, max(height - blob_size, 1)))
+        x0 = int(rng.integers(0, max(width - blob_size, 1)))
+        frame[y0:y0 + blob_size, x0:x0 + blob_size, :3] = (b, g, r)
+    if noise > 0:
+        n = int(width * height * noise)
+        ys = rng.integers(0, height, n)
+        xs = rng.integers(0, width, n)
+        frame[ys, xs, :3] = rng.integers(0, 256, (n, 3), dtype=np.uint8)
+    raw = bytearray(frame.tobytes())
+    return SimpleNamespace(raw=raw, width=width, height=height, size=(width, height))
+
+
+def timeit(fn, repeat):
+    # (최소, 중앙값) 초, 마지막 결과
+    times = []
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - t0)
+    return min(times), float(np.median(times)), result
+
+
+def peak_memory(fn):
+    # fn 한 번 실행 중 파이썬/NumPy 할당 최대치 (byte)
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench_case(size, blobs, blob_size, noise, tol, repeat, workers=1):
+    w, h = parse_size(size)
+    grab = make_grab(w, h, TARGET, blobs, blob_size, noise)
+    frame = frame_from_grab(grab)
+    matcher = ColorMatcher()
+    mask = matcher.match(frame, TARGET, tol)
+    engine = DetectionEngine(color=TARGET, tol=tol, border=BORDER)
+    mon = {"left": 0, "top": 0, "width": w, "height": h}
+
+    cases = [
+        ("convert", lambda: frame_from_grab(grab)),
+        ("mask", lambda: matcher.match(frame, TARGET, tol)),
+        ("label", lambda: label_blobs(mask, BORDER)),
+        ("select", lambda: find_top_left_blob(mask, BORDER)),
+        ("detect", lambda: engine.detect(frame_from_grab(grab), mon)),
+    ]
+    par = None
+    if workers > 1:
+        par = DetectionEngine(color=TARGET, tol=tol, border=BORDER, workers=workers)
+        cases.append(("detect_par", lambda: par.detect(frame_from_grab(grab), mon)))
+
+    stages = {}
+    for name, fn in cases:
+        fn()  # 워밍업 (버퍼 할당)
+        best, med, result = timeit(fn, repeat)
+        stages[name] = {"min_ms": best * 1000, "median_ms": med * 1000}
+        if name == "label":
+            n_blobs = len(result)
+        elif name == "detect":
+            hit = result
+        elif name == "detect_par":
+            assert (result and result.pos) == (hit and hit.pos), "parallel result mismatch"
+    if par is not None:
+        par.close()
+
+    # 새 엔진 기준 (버퍼 할당 포함) 최대 메모리
+    peak = peak_memory(lambda: DetectionEngine(color=TARGET, tol=tol, border=BORDER)
+                       .detect(frame_from_grab(grab), mon))
+    return {
+        "size": size, "width": w, "height": h,
+        "blobs": blobs, "blob_size": blob_size, "noise": noise, "tol": tol,
+        "hits": int(mask.sum()),
+        "labeled_blobs": n_blobs,
+        "target": list(hit.pos) if hit else None,
+        "stages": stages,
+        "fps": 1000.0 / stages["detect"]["median_ms"],
+        "peak_kb": peak / 1024,
+    }
+
+
+def case_key(r):
+    return (r["size"], r["blobs"], r["blob_size"], r["noise"], r["tol"])
+
+
+def print_row(r, base=None):
+    s = r["stages"]
+    line = (f"{r['size']:>9} blobs={r['blobs']:<4} bsz={r['blob_size']:<3} "
+            f"noise={r['noise']:<5} tol={r['tol']:<3} | "
+            f"conv {s['convert']['median_ms']:7.3f}  mask {s['mask']['median_ms']:7.2f}  "
+            f"label {s['label']['median_ms']:8.2f}  select {s['select']['median_ms']:7.2f}  "
+            f"detect {s['detect']['median_ms']:7.2f} ms  {r['fps']:7.1f} fps  "
+            + (f"par {s['detect_par']['median_ms']:7.2f} ms  " if "detect_par" in s else "")
+            + f"peak {r['peak_kb'] / 1024:6.1f} MB")
+    if base is not None:
+        ratio = r["stages"]["detect"]["median_ms"] / base["stages"]["detect"]["median_ms"]
+        flag = "  <-- 느려짐" if ratio > 1.2 else ""
+        line += f"  x{ratio:.2f} vs base{flag}"
+    print(line)
+
+
+# ---- 예전(픽셀 루프) 방식과 비교 ----
+def legacy_mask(grab, color, tol):
+    # 기존 find_color_inside 의 매칭 부분 (Image.frombytes + 픽셀별 abs 비교)
+    from PIL import Image
+    frame = frame_from_grab(grab)
+    img = Image.frombytes("RGB", grab.size, frame[..., [2, 1, 0]].tobytes())
+    pix = img.load()
+    w, h = grab.size
+    hits = 0
+    for i in range(w):
+        for j in range(h):
+            r, g, b = pix[i, j]
+            if (abs(r - color[0]) <= tol and
+                abs(g - color[1]) <= tol and
+                abs(b - color[2]) <= tol):
+                hits += 1
+    return hits
+
+
+def run_legacy(sizes, tol):
+    for size in sizes:
+        w, h = parse_size(size)
+        grab = make_grab(w, h, noise=0.05)
+        t_new, _, hits_new = timeit(lambda: int(match_mask(frame_from_grab(grab), TARGET, tol).sum()), 5)
+        t_old, _, hits_old = timeit(lambda: legacy_mask(grab, TARGET, tol), 1)
+        assert hits_old == hits_new, "mask mismatch"
+        print(f"{size}: legacy {t_old * 1000:9.2f} ms, numpy {t_new * 1000:7.2f} ms, "
+              f"x{t_old / t_new:.1f} (hits={hits_new})")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", nargs="+", default=["HD", "QHD", "4K"],
+                    help="HD/FHD/QHD/4K 또는 WxH")
+    ap.add_argument("--blobs", nargs="+", type=int, default=[1, 50])
+    ap.add_argument("--blob-sizes", nargs="+", type=int, default=[8, 40])
+    ap.add_argument("--noise", nargs="+", type=float, default=[0.0, 0.05])
+    ap.add_argument("--tols", nargs="+", type=int, default=[40])
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--workers", type=int, default=1, help="2 이상이면 band 병렬 엔진도 측정 (scan_workers 켜기 전 확인용)")
+    ap.add_argument("--out", default="bench_results.json")
+    ap.add_argument("--compare", help="이전 결과 json (detect 시간 비교)")
+    ap.add_argument("--legacy", action="store_true", help="예전 픽셀 루프와 마스크 비교만")
+    args = ap.parse_args()
+
+    if args.legacy:
+        run_legacy(args.sizes, args.tols[0])
+        return
+
+    base = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            base = {case_key(r): r for r in json.load(f)["results"]}
+
+    results = []
+    for size, blobs, bsz, noise, tol in itertools.product(
+            args.sizes, args.blobs, args.blob_sizes, args.noise, args.tols):
+        r = bench_case(size, blobs, bsz, noise, tol, args.repeat, args.workers)
+        results.append(r)
+        print_row(r, base.get(case_key(r)))
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump({
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "repeat": args.repeat,
+            "workers": args.workers,
+            "results": results,
+        }, f, indent=1, ensure_ascii=False)
+    print(f"저장: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
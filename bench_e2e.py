@@ -0,0 +1,470 @@
+import argparse
+import contextlib
+import itertools
+import json
+import os
+import platform
+import queue
+import random
+import subprocess
+import sys
+import threading
+import time
+
+# =========================== 화면 변화 -> 클릭 도착 종단 지연 측정 ===========================
+# bench_detect.py 는 분석만 잰다. 여기서는 실제 화면에 목표색이 뜬 순간부터
+# 그 클릭이 화면 쪽에 도착할 때까지를 잰다 (리눅스, 모니터 없는 서버에서도).
+#
+#   [Xvfb 가상 디스플레이]
+#     ├─ 대역 페이지 (이 파일 --page, Tk) : 명령 받은 시각에 목표색 사각형을 그리고
+#     │                                    그 시각(paint)과 클릭이 도착한 시각(click)을 알려줌
+#     └─ 감시 쪽 (이 프로세스) : Overlay 와 같은 조합으로 파이프라인을 돌림
+#          CaptureSession(mss) -> DetectionEngine(incremental) -> DetectPipeline(연속 감시)
+#          -> run_click_sequence(default_backend() = pyautogui)
+#
+# 두 프로세스 모두 perf_counter (리눅스: CLOCK_MONOTONIC, 프로세스끼리 같은 시계) 로 시각을 찍는다.
+# 시도 한 번 = 사각형 그리기 -> 클릭 도착 (또는 timeout) -> 지우기. 그리는 시점은 감시 박자와
+# 어긋나도록 매번 무작위로 늦춘다. 조합(간격 x 허용오차 x 영역 크기)마다 분포를 낸다.
+#   total        : 그림 -> 클릭 도착 (사용자가 체감하는 값)
+#   wait         : 그림 -> 그 화면을 잡은 캡처 시작 (감시 간격 때문에 기다린 시간)
+#   grab_to_send : 캡처 시작 -> 클릭 전송 (캡처 + 분석 + 클릭 호출)
+#   deliver      : 클릭 전송 -> 페이지가 받음 (X 서버 / 이벤트 전달)
+#
+#   python bench_e2e.py                                  # Xvfb 띄워서 기본 조합, e2e_results.json
+#   python bench_e2e.py --intervals 0.05 --tols 40 --regions 1600x900 --trials 100
+#   python bench_e2e.py --out after.json --compare before.json
+#   python bench_e2e.py --display :0 --no-xvfb           # 이미 떠 있는 X 디스플레이 사용
+#
+# 필요: Xvfb, mss, pyautogui (+ python3-xlib), tkinter
+# Overlay 창 자체는 윈도우 전용 속성(-transparentcolor)을 써서 리눅스에서 못 띄우므로
+# 같은 부품을 같은 설정으로 직접 조립한다 (_on_hit 의 첫 클릭 경로와 동일).
+
+TARGET = (255, 0, 0)
+PAINT = "#f01010"       # 채널별로 목표색과 15~16 차이 -> 허용오차 16 미만이면 못 찾음
+BACKGROUND = "#d8d8d8"
+MARGIN = 8              # 영역 가장자리에서 이만큼 안쪽에만 그림
+METRICS = ("total", "wait", "grab_to_send", "deliver")
+
+
+def parse_size(name):
+    w, h = name.lower().split("x")
+    return int(w), int(h)
+
+
+def _emit(**event):
+    sys.stdout.write(json.dumps(event) + "\n")
+    sys.stdout.flush()
+
+
+# =========================== 대역 페이지 (자식 프로세스) ===========================
+# stdin 으로 한 줄 JSON 명령, stdout 으로 한 줄 JSON 이벤트
+#   {"cmd": "paint", "trial": k, "rect": [x, y, w, h], "color": "#rrggbb"} -> {"ev": "paint", ...}
+#   {"cmd": "clear"}  /  {"cmd": "quit"}
+#   클릭이 오면 -> {"ev": "click", "t": .., "x": .., "y": .., "trial": k, "inside": bool}
+def run_page(width, height, clutter, seed):
+    import tkinter as tk
+
+    root = tk.Tk()
+    root.overrideredirect(True)
+    root.geometry(f"{width}x{height}+0+0")
+    canvas = tk.Canvas(root, width=width, height=height, bg=BACKGROUND, highlightthickness=0)
+    canvas.pack()
+
+    # 실제 예매 화면처럼 목표색과 먼 색의 좌석(정적인 사각형)을 깔아둠
+    rng = random.Random(seed)
+    for _ in range(clutter):
+        while True:
+            rgb = [rng.randrange(256) for _ in range(3)]
+            if max(abs(a - b) for a, b in zip(rgb, TARGET)) > 100:
+                break
+        x, y = rng.randrange(width - 20), rng.randrange(height - 20)
+        canvas.create_rectangle(x, y, x + 20, y + 20, fill="#%02x%02x%02x" % tuple(rgb), outline="")
+
+    state = {"item": None, "trial": None, "rect": None}
+
+    def clear():
+        if state["item"] is not None:
+            canvas.delete(state["item"])
+            state["item"] = None
+            root.update_idletasks()
+
+    buf = [b""]
+
+    def on_command(*_):
+        # readline 은 버퍼에 남은 줄을 못 알아채서 (파일 핸들러가 다시 안 불림) 직접 나눔
+        data = os.read(sys.stdin.fileno(), 65536)
+        if not data:
+            root.destroy()
+            return
+        *lines, buf[0] = (buf[0] + data).split(b"\n")
+        for line in lines:
+            if line.strip():
+                handle(json.loads(line))
+
+    def handle(cmd):
+        if cmd["cmd"] == "paint":
+            clear()
+            x, y, w, h = cmd["rect"]
+            state["trial"], state["rect"] = cmd["trial"], (x, y, w, h)
+            t0 = time.perf_counter()
+            state["item"] = canvas.create_rectangle(x, y, x + w, y + h, fill=cmd["color"],
+                                                    outline="")
+            root.update_idletasks()
+            # 왕복 요청 하나 -> 그리기 요청이 X 서버에서 처리 끝난 뒤에 돌아옴
+            root.winfo_pointerxy()
+            t = time.perf_counter()
+            _emit(ev="paint", trial=state["trial"], t=t, paint_ms=(t - t0) * 1000)
+        elif cmd["cmd"] == "clear":
+            clear()
+            _emit(ev="cleared")
+        elif cmd["cmd"] == "quit":
+            root.destroy()
+
+    def on_click(e):
+        t = time.perf_counter()
+        inside = False
+        if state["rect"] is not None:
+            x, y, w, h = state["rect"]
+            inside = x <= e.x_root < x + w and y <= e.y_root < y + h
+        _emit(ev="click", t=t, x=e.x_root, y=e.y_root, trial=state["trial"], inside=inside)
+        # 눌리면 사라지는 좌석처럼 지움 -> 연속 감시의 TriggerGate 가 다시 풀림
+        clear()
+
+    canvas.bind("<Button-1>", on_click)
+    root.tk.createfilehandler(sys.stdin, tk.READABLE, on_command)
+    root.update()
+    _emit(ev="ready", width=width, height=height)
+    root.mainloop()
+
+
+# =========================== 감시 쪽 ===========================
+class VirtualDisplay:
+    # Xvfb 를 띄우고 DISPLAY 를 맞춘다 (with 블록 끝나면 종료)
+    def __init__(self, width, height, display=":99"):
+        self.display = display
+        self.size = (width, height)
+        self.proc = None
+
+    def __enter__(self):
+        w, h = self.size
+        self.proc = subprocess.Popen(
+            ["Xvfb", self.display, "-screen", "0", f"{w}x{h}x24", "-nolisten", "tcp"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        sock = f"/tmp/.X11-unix/X{self.display.lstrip(':').split('.')[0]}"
+        deadline = time.perf_counter() + 10
+        while not os.path.exists(sock):
+            if self.proc.poll() is not None:
+                raise RuntimeError(f"Xvfb 실행 실패 ({self.display} 사용 중?)")
+            if time.perf_counter() > deadline:
+                self.proc.kill()
+                raise RuntimeError("Xvfb 가 10초 안에 안 뜸")
+            time.sleep(0.05)
+        os.environ["DISPLAY"] = self.display
+        return self
+
+    def __exit__(self, *exc):
+        if self.proc is not None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(5)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+
+
+class StandInPage:
+    # 대역 페이지 자식 프로세스 + 이벤트 읽는 스레드
+    def __init__(self, width, height, clutter=200, seed=0):
+        self.proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--page", f"{width}x{height}",
+             "--clutter", str(clutter), "--seed", str(seed)],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True, bufsize=1,
+            env=os.environ.copy())
+        self.events = queue.Queue()
+        self._reader = threading.Thread(target=self._read, name="page", daemon=True)
+        self._reader.start()
+        if self.wait("ready", timeout=10) is None:
+            self.close()
+            raise RuntimeError("대역 페이지가 안 뜸")
+
+    def _read(self):
+        for line in self.proc.stdout:
+            try:
+                self.events.put(json.loads(line))
+            except ValueError:
+                print(f"[page] {line.rstrip()}")
+        self.events.put({"ev": "exit"})
+
+    def _send(self, **cmd):
+        self.proc.stdin.write(json.dumps(cmd) + "\n")
+        self.proc.stdin.flush()
+
+    def wait(self, kind, trial=None, timeout=2.0):
+        # kind 이벤트(trial 이 맞는 것)가 올 때까지. 지난 시도의 늦은 클릭 등은 버림
+        deadline = time.perf_counter() + timeout
+        while True:
+            remain = deadline - time.perf_counter()
+            if remain <= 0:
+                return None
+            try:
+                ev = self.events.get(timeout=remain)
+            except queue.Empty:
+                return None
+            if ev["ev"] == "exit":
+                raise RuntimeError("대역 페이지가 종료됨")
+            if ev["ev"] == kind and (trial is None or ev.get("trial") == trial):
+                return ev
+
+    def paint(self, trial, rect, color=PAINT):
+        self._send(cmd="paint", trial=trial, rect=list(rect), color=color)
+        return self.wait("paint", trial)
+
+    def clear(self):
+        self._send(cmd="clear")
+        return self.wait("cleared")
+
+    def close(self):
+        try:
+            self._send(cmd="quit")
+        except (OSError, ValueError):
+            pass
+        try:
+            self.proc.wait(5)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+
+
+class MonitorUnderTest:
+    # Overlay 의 감시 경로 (연속 감시 모드) 를 UI 없이 같은 부품으로 조립
+    def __init__(self, capture, backend, interval, tol, color=TARGET):
+        from continuous import FrameDeduper, TriggerGate
+        from engine import DetectionEngine
+        from scheduler import PollScheduler
+        from telemetry import TickRecorder
+        from worker import DetectPipeline
+
+        self.backend = backend
+        self.color, self.tol, self.interval = color, tol, interval
+        self.engine = DetectionEngine(capture, border=0, incremental=True)
+        self.recorder = TickRecorder(window=100000)
+        # 같은 자리에 다음 시도가 그려져도 다시 누르도록: 한 프레임만 안 보여도 풀림, cooldown 없음
+        self.gate = TriggerGate(cooldown=None, miss_frames=1)
+        self.sent = queue.Queue()   # (t_grab, t_detect, t_send, pos)
+        # Overlay 와 같이 incremental 엔진의 "바뀐 타일 없음" 으로 같은 화면 판정 (crc 안 씀)
+        dedupe = FrameDeduper(probe=lambda: self.engine.unchanged)
+        self.pipeline = DetectPipeline(
+            capture, self._detect, self._on_hit, lambda: self.interval,
+            scheduler=PollScheduler(lambda: self.interval), recorder=self.recorder,
+            timings=lambda: self.engine.timings, dedupe=dedupe, gate=self.gate,
+            settings=lambda: (self.color, self.tol))
+
+    def _detect(self, frame, mon):
+        return self.engine.detect(frame, mon, self.color, self.tol)
+
+    def _on_hit(self, hit, frame, mon, t_grab, tick=None):
+        from input_backend import run_click_sequence
+        t_detect = time.perf_counter()
+        click_times = run_click_sequence(self.backend, [(0, *hit.pos)],
+                                         stop=self.pipeline.stop_event)
+        if click_times:
+            if tick is not None:
+                tick["detect_to_click_ms"] = (click_times[0] - t_detect) * 1000
+                tick["grab_to_click_ms"] = (click_times[0] - t_grab) * 1000
+            self.sent.put((t_grab, t_detect, click_times[0], hit.pos))
+        return True
+
+    def take_sent(self, after, timeout=0.5):
+        # after(페이지가 그리기 시작한 시각) 이후에 보낸 첫 클릭. 없으면 None
+        # 클릭이 페이지에 먼저 도착하고 sent 에는 조금 늦게 들어올 수 있어서 잠깐 기다림
+        deadline = time.perf_counter() + timeout
+        while True:
+            try:
+                item = self.sent.get(timeout=max(deadline - time.perf_counter(), 0))
+            except queue.Empty:
+                return None
+            if item[2] >= after:
+                return item
+
+    def start(self):
+        self.pipeline.start()
+
+    def stop(self):
+        self.pipeline.stop()
+        self.pipeline.join(1.0)
+        self.engine.close()
+
+    def error(self):
+        while True:
+            try:
+                kind, value, _ = self.pipeline.events.get_nowait()
+            except queue.Empty:
+                return None
+            if kind == "error":
+                return value
+
+
+def random_rect(rng, region, size):
+    rw, rh = region
+    x = rng.randrange(MARGIN, max(rw - size - MARGIN, MARGIN + 1))
+    y = rng.randrange(MARGIN, max(rh - size - MARGIN, MARGIN + 1))
+    return x, y, size, size
+
+
+def run_case(page, capture, backend, interval, tol, region, trials, target_size, timeout, rng):
+    capture.set_region(0, 0, *region)
+    mon = MonitorUnderTest(capture, backend, interval, tol)
+    samples = {m: [] for m in METRICS}
+    misses = wrong = 0
+    mon.start()
+    try:
+        # 첫 프레임(전체 타일 검사)과 mss 초기화는 측정에서 뺌
+        time.sleep(max(interval * 3, 0.2))
+        for k in range(trials):
+            # 감시 박자와 어긋나게: 최소 2 박자(게이트 풀림) + 0~1 박자 무작위
+            time.sleep(interval * (2 + rng.random()))
+            painted = page.paint(k, random_rect(rng, region, target_size))
+            if painted is None:
+                raise RuntimeError("대역 페이지 응답 없음")
+            click = page.wait("click", k, timeout)
+            if click is None:
+                misses += 1
+                page.clear()
+                continue
+            sent = mon.take_sent(painted["t"] - painted["paint_ms"] / 1000)
+            if not click["inside"]:
+                wrong += 1
+            samples["total"].append((click["t"] - painted["t"]) * 1000)
+            if sent is not None:
+                t_grab, _, t_send, _ = sent
+                samples["wait"].append((t_grab - painted["t"]) * 1000)
+                samples["grab_to_send"].append((t_send - t_grab) * 1000)
+                samples["deliver"].append((click["t"] - t_send) * 1000)
+        err = mon.error()
+        if err:
+            raise RuntimeError(err)
+    finally:
+        mon.stop()
+    ticks = mon.recorder.summary()
+    return {
+        "interval": interval, "tol": tol, "region": f"{region[0]}x{region[1]}",
+        "trials": trials, "clicked": trials - misses, "misses": misses, "wrong": wrong,
+        "latency_ms": {m: distribution(v) for m, v in samples.items()},
+        "ticks": {s: ticks[s] for s in ("capture", "convert", "detect") if s in ticks},
+        "fps": ticks["fps"],
+    }
+
+
+def distribution(values):
+    from telemetry import percentile
+    values = sorted(values)
+    if not values:
+        return None
+    return {"n": len(values), "mean": sum(values) / len(values), "min": values[0],
+            "p50": percentile(values, 0.5), "p90": percentile(values, 0.9),
+            "p95": percentile(values, 0.95), "p99": percentile(values, 0.99),
+            "max": values[-1]}
+
+
+def case_key(r):
+    return r["interval"], r["tol"], r["region"]
+
+
+def print_row(r, base=None):
+    lat = r["latency_ms"]
+    head = f"간격 {r['interval'] * 1000:5.0f}ms  허용 {r['tol']:3d}  {r['region']:>9}  "
+    total = lat["total"]
+    if total is None:
+        print(head + f"클릭 0/{r['trials']}")
+        return
+    line = head + (f"total p50 {total['p50']:7.1f}  p95 {total['p95']:7.1f}  "
+                   f"max {total['max']:7.1f}ms")
+    for m in ("wait", "grab_to_send", "deliver"):
+        if lat[m] is not None:
+            line += f"  {m} {lat[m]['p50']:.1f}"
+    line += f"  클릭 {r['clicked']}/{r['trials']}"
+    if r["wrong"]:
+        line += f" (엉뚱한 곳 {r['wrong']})"
+    if base is not None and base["latency_ms"]["total"] is not None:
+        b = base["latency_ms"]["total"]
+        line += f"  [이전 p50 {b['p50']:.1f} p95 {b['p95']:.1f}]"
+    print(line)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--intervals", nargs="+", type=float, default=[0.1, 0.05, 0.02],
+                    help="감시 간격(초)")
+    ap.add_argument("--tols", nargs="+", type=int, default=[20, 40, 80])
+    ap.add_argument("--regions", nargs="+", default=["400x300", "900x600", "1600x900"],
+                    help="감시 영역 WxH")
+    ap.add_argument("--trials", type=int, default=40, help="조합당 시도 횟수")
+    ap.add_argument("--target-size", type=int, default=24, help="그리는 사각형 한 변(px)")
+    ap.add_argument("--clutter", type=int, default=200, help="배경에 깔 다른 색 사각형 수")
+    ap.add_argument("--timeout", type=float, default=2.0, help="이 시간(초) 안에 클릭 없으면 놓침")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--display", default=":99")
+    ap.add_argument("--no-xvfb", action="store_true", help="--display 의 기존 X 서버 사용")
+    ap.add_argument("--out", default="e2e_results.json")
+    ap.add_argument("--compare", help="이전 결과 json (total 지연 비교)")
+    ap.add_argument("--page", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.page:
+        run_page(*parse_size(args.page), args.clutter, args.seed)
+        return
+
+    clock = time.get_clock_info("perf_counter").implementation
+    if "CLOCK_MONOTONIC" not in clock:
+        sys.exit(f"perf_counter 가 프로세스끼리 같은 시계가 아님 ({clock}) -> 리눅스에서 실행")
+
+    regions = [parse_size(r) for r in args.regions]
+    width = max(w for w, _ in regions)
+    height = max(h for _, h in regions)
+
+    base = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            base = {case_key(r): r for r in json.load(f)["results"]}
+
+    if args.no_xvfb:
+        os.environ["DISPLAY"] = args.display
+        display = contextlib.nullcontext()
+    else:
+        display = VirtualDisplay(width, height, args.display)
+
+    from capture import CaptureSession
+    from input_backend import default_backend
+
+    rng = random.Random(args.seed)
+    results = []
+    with display:
+        page = StandInPage(width, height, args.clutter, args.seed)
+        capture = CaptureSession()
+        try:
+            backend = default_backend()   # DISPLAY 를 맞춘 뒤에 만들어야 함 (pyautogui)
+            for interval, tol, region in itertools.product(args.intervals, args.tols, regions):
+                r = run_case(page, capture, backend, interval, tol, region, args.trials,
+                             args.target_size, args.timeout, rng)
+                results.append(r)
+                print_row(r, base.get(case_key(r)))
+        finally:
+            capture.close()
+            page.close()
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump({
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "display": "existing" if args.no_xvfb else "xvfb",
+            "backend": backend.name,
+            "trials": args.trials,
+            "target_size": args.target_size,
+            "paint_color": PAINT,
+            "results": results,
+        }, f, indent=1, ensure_ascii=False)
+    print(f"저장: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import threading
+import time
+
+import numpy as np
+
+from detector import frame_from_grab, B, G, R
+
+# =========================== 프레임 소스 ===========================
+# 모든 소스는 같은 형태를 가진다:
+#   .region         -> {"left", "top", "width", "height"} (화면 좌표)
+#   .grab(mon=None) -> (h, w, 4) BGRA uint8 배열, 더 없으면 None
+# CaptureSession 만 실제 화면(mss)을 쓰고, 나머지는 오프라인(테스트/벤치/재현)용.
+
+
+def to_bgra(arr):
+    # (h, w, 3) RGB / (h, w, 4) BGRA / (h, w) 회색 -> 연속된 (h, w, 4) BGRA
+    arr = np.asarray(arr, dtype=np.uint8)
+    if arr.ndim == 3 and arr.shape[2] == 4:
+        return np.ascontiguousarray(arr)
+    out = np.empty(arr.shape[:2] + (4,), dtype=np.uint8)
+    if arr.ndim == 2:
+        out[..., B] = out[..., G] = out[..., R] = arr
+    else:
+        out[..., B], out[..., G], out[..., R] = arr[..., 2], arr[..., 1], arr[..., 0]
+    out[..., 3] = 255
+    return out
+
+
+def _region_of(frame, left=0, top=0):
+    return {"left": left, "top": top, "width": frame.shape[1], "height": frame.shape[0]}
+
+
+# ---- 실시간 화면 캡처 ----
+# mss 인스턴스를 한 번만 만들고 계속 재사용한다.
+# 감시 영역은 창 이동/크기 변경 시에만 set_region 으로 갱신.
+
+
+class CaptureSession:
+    def __init__(self):
+        self._local = threading.local()
+        self._all = []
+        self._lock = threading.Lock()
+        self._mon = None
+
+    # mss 는 만든 스레드에서만 써야 함 (윈도우 GDI 핸들) -> 스레드별로 첫 grab 때 생성
+    def _grabber(self):
+        sct = getattr(self._local, "sct", None)
+        if sct is None:
+            import mss
+            sct = self._local.sct = mss.mss()
+            with self._lock:
+                self._all.append(sct)
+        return sct
+
+    def set_region(self, left, top, width, height):
+        # dict 통째로 교체 (grab 쪽에서 읽는 도중 반쯤 바뀐 값을 보지 않도록)
+        self._mon = {"left": int(left), "top": int(top),
+                     "width": max(int(width), 1), "height": max(int(height), 1)}
+
+    @property
+    def region(self):
+        return self._mon
+
+    def grab(self, mon=None, timings=None):
+        # 영역을 캡처해서 (h, w, 4) BGRA 배열(복사 없는 view)로 반환
+        # timings(dict) 를 주면 capture_ms / convert_ms 를 채움
+        if timings is None:
+            return frame_from_grab(self._grabber().grab(mon or self._mon))
+        t0 = time.perf_counter()
+        shot = self._grabber().grab(mon or self._mon)
+        t1 = time.perf_counter()
+        frame = frame_from_grab(shot)
+        timings["capture_ms"] = (t1 - t0) * 1000
+        timings["convert_ms"] = (time.perf_counter() - t1) * 1000
+        return frame
+
+    def monitors(self):
+        # 모니터별 영역 목록 (가상 화면 좌표, mss.monitors[1:])
+        return [dict(m) for m in self._grabber().monitors[1:]]
+
+    def grab_pixel(self, x, y):
+        sct_img = self._grabber().grab({"left": x, "top": y, "width": 1, "height": 1})
+        px = frame_from_grab(sct_img)[0, 0]
+        return int(px[R]), int(px[G]), int(px[B])
+
+    def close(self):
+        with self._lock:
+            for sct in self._all:
+                try:
+                    sct.close()
+                except Exception:
+                    pass
+            self._all.clear()
+        self._local = threading.local()
+
+
+# ---- 오프라인 소스 ----
+class ArraySource:
+    # 배열 한 장을 계속 돌려준다 (RGB 면 한 번만 BGRA 로 변환)
+    def __init__(self, frame, left=0, top=0):
+        self.frame = to_bgra(frame)
+        self.region = _region_of(self.frame, left, top)
+
+    def grab(self, mon=None):
+        return self.frame
+
+    def close(self):
+        pass
+
+
+class ImageFileSource(ArraySource):
+    # PNG 등 이미지 파일 (찰칵_*.png 스크린샷 재현용)
+    def __init__(self, path, left=0, top=0):
+        from PIL import Image
+        with Image.open(path) as img:
+            super().__init__(np.asarray(img.convert("RGB")), left, top)
+
+
+class SequenceSource:
+    # 배열/파일 경로 목록을 순서대로 한 장씩. 끝나면 None (loop=True 면 처음부터)
+    def __init__(self, frames, left=0, top=0, loop=False):
+        self._items = list(frames)
+        self._left, self._top = left, top
+        self.loop = loop
+        self.index = 0
+        self.region = None
+        if self._items:
+            self.region = _region_of(self._load(0), left, top)
+
+    def _load(self, i):
+        item = self._items[i]
+        if isinstance(item, (str, bytes)) or hasattr(item, "__fspath__"):
+            item = self._items[i] = ImageFileSource(item).frame
+        elif not (isinstance(item, np.ndarray) and item.ndim == 3 and item.shape[2] == 4):
+            item = self._items[i] = to_bgra(item)
+        return item
+
+    def grab(self, mon=None):
+        if self.index >= len(self._items):
+            if not self.loop or not self._items:
+                return None
+            self.index = 0
+        frame = self._load(self.index)
+        self.index += 1
+        return frame
+
+    def close(self):
+        pass
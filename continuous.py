@@ -0,0 +1,105 @@
+import math
+import time
+import zlib
+
+import numpy as np
+
+# =========================== 연속 감시 모드 ===========================
+# 한 번 인식하고 멈추는 대신 계속 감시할 때 필요한 것들.
+#   FrameDeduper : 직전 프레임과 완전히 같은 화면이면 분석을 건너뛰고 지난 결과를 그대로 씀
+#                  (crc32 한 번, 1600x900 기준 약 3ms. 프레임을 들고 있지 않음)
+#                  incremental 엔진은 화면이 그대로면 줄 비교 한 번(약 1ms)으로 끝나서 crc 가
+#                  오히려 손해 -> probe 로 엔진의 "바뀐 타일 0" 을 받아서 그걸로 같은 화면을 판단
+#   TriggerGate  : 같은 blob 이 계속 보이는 동안 매 tick 클릭하지 않도록
+#                  한 번 누르면 잠그고, blob 이 사라지거나(miss_frames 연속 미인식)
+#                  cooldown 초가 지나면 다시 풀림. 멀리(radius px 밖) 다른 blob 은 바로 누름.
+
+
+def _crc(frame, crc=0):
+    if frame.flags.c_contiguous:
+        return zlib.crc32(frame.data, crc)
+    # 영역 view (큰 캡처에서 잘라낸 것) 는 줄마다는 연속 -> 복사 없이 줄 단위로 이어서 계산
+    for row in frame:
+        crc = zlib.crc32(row.data if row.flags.c_contiguous else np.ascontiguousarray(row), crc)
+    return crc
+
+
+def frame_hash(frame):
+    # frame: 배열 하나 또는 regions.RegionFrame 튜플 (여러 영역 감시)
+    if isinstance(frame, tuple):
+        crc = 0
+        for rf in frame:
+            crc = _crc(rf.frame, crc)
+        return crc, tuple(rf.frame.shape for rf in frame)
+    return _crc(frame), frame.shape
+
+
+class FrameDeduper:
+    def __init__(self, probe=None):
+        # probe: 방금 분석이 화면 변화 없이 끝났는지 (True/False), 엔진이 모르면 None
+        #        (engine.DetectionEngine.unchanged). 직전 분석에서 값을 줬으면 crc 를 건너뜀
+        self.probe = probe
+        self.reset()
+
+    def reset(self):
+        self._key = None
+        self.skipped = 0
+
+    def same(self, frame, extra=None):
+        # 직전과 같은 화면이면 True. extra 는 설정(색/허용오차 등)처럼 결과에 영향을 주는 값
+        if self.probe is not None and self.probe() is not None:
+            # 엔진이 직접 비교함 -> 분석은 하고 after_detect 에서 판단
+            self._key = None
+            return False
+        key = (frame_hash(frame), extra)
+        if key == self._key:
+            self.skipped += 1
+            return True
+        self._key = key
+        return False
+
+    def after_detect(self):
+        # 분석 뒤: 엔진이 "화면 그대로" 라고 했으면 True (같은 화면으로 셈)
+        if self.probe is not None and self.probe():
+            self.skipped += 1
+            return True
+        return False
+
+
+class TriggerGate:
+    def __init__(self, cooldown=3.0, radius=16, miss_frames=2):
+        self.cooldown = cooldown        # 같은 blob 이 계속 보여도 이 시간(초)이 지나면 다시 누름 (None = 안 누름)
+        self.radius = radius            # 이 거리(px) 안이면 같은 blob 으로 봄
+        self.miss_frames = miss_frames  # 이만큼 연속으로 안 보이면 사라진 것으로 봄
+        self.reset()
+
+    def reset(self):
+        self._pos = None      # 마지막으로 누른 위치 (잠김 상태), None 이면 풀림
+        self._t = 0.0
+        self._misses = 0
+        self.fired = 0
+        self.suppressed = 0
+
+    @property
+    def armed(self):
+        return self._pos is None
+
+    def update(self, pos, now=None):
+        # 이번 프레임 인식 위치(없으면 None) -> 클릭해야 하면 True
+        now = time.perf_counter() if now is None else now
+        if pos is None:
+            self._misses += 1
+            if self._pos is not None and self._misses >= self.miss_frames:
+                self._pos = None
+            return False
+        self._misses = 0
+        if self._pos is not None:
+            same = math.dist(pos, self._pos) <= self.radius
+            expired = self.cooldown is not None and now - self._t >= self.cooldown
+            if same and not expired:
+                self.suppressed += 1
+                return False
+        self._pos = pos
+        self._t = now
+        self.fired += 1
+        return True
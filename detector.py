@@ -0,0 +1,370 @@
+from collections import namedtuple
+
+import numpy as np  # pip install numpy
+
+# =========================== 색상 매칭 ===========================
+# mss 캡처 결과는 BGRA 순서 -> 채널 인덱스
+B, G, R = 0, 1, 2
+
+
+def frame_from_grab(sct_img):
+    # mss ScreenShot 의 raw(bytearray) 를 복사 없이 (h, w, 4) 배열로 본다
+    return np.frombuffer(sct_img.raw, dtype=np.uint8).reshape(
+        sct_img.height, sct_img.width, 4)
+
+
+def _channel_in_range(ch, c, tol, out=None, diff=None):
+    # |ch - c| <= tol  <=>  lo <= ch <= hi
+    # uint8 뺄셈의 wrap-around 를 이용해서 비교 한 번으로 처리
+    lo = max(int(c) - int(tol), 0)
+    hi = min(int(c) + int(tol), 255)
+    if lo > hi:
+        if out is None:
+            return np.zeros(ch.shape, dtype=bool)
+        out[...] = False
+        return out
+    diff = np.subtract(ch, np.uint8(lo), dtype=np.uint8, out=diff)
+    return np.less_equal(diff, hi - lo, out=out)
+
+
+def match_mask(frame, color, tol):
+    # 프레임 전체에 대해 한 번에 허용오차 마스크 생성 (채널별 <= tol)
+    r, g, b = color
+    mask = _channel_in_range(frame[..., R], r, tol)
+    mask &= _channel_in_range(frame[..., G], g, tol)
+    mask &= _channel_in_range(frame[..., B], b, tol)
+    return mask
+
+
+class ColorMatcher:
+    # 같은 크기의 프레임이 계속 들어오므로 마스크/임시 버퍼를 재사용 (tick 당 할당 없음)
+    # 반환되는 마스크는 다음 match 호출 때 덮어써진다
+    def __init__(self):
+        self._mask = None
+        self._tmp = None
+        self._diff = None
+
+    def _buffers(self, shape):
+        if self._mask is None or self._mask.shape != shape:
+            self._mask = np.empty(shape, dtype=bool)
+            self._tmp = np.empty(shape, dtype=bool)
+            self._diff = np.empty(shape, dtype=np.uint8)
+        return self._mask, self._tmp, self._diff
+
+    def match(self, frame, color, tol):
+        mask, tmp, diff = self._buffers(frame.shape[:2])
+        return match_into(frame, color, tol, mask, tmp, diff)
+
+
+def match_into(frame, color, tol, mask, tmp, diff):
+    # match_mask 와 같지만 결과/임시 버퍼를 받아서 씀 (할당 없음)
+    r, g, b = color
+    _channel_in_range(frame[..., R], r, tol, out=mask, diff=diff)
+    mask &= _channel_in_range(frame[..., G], g, tol, out=tmp, diff=diff)
+    mask &= _channel_in_range(frame[..., B], b, tol, out=tmp, diff=diff)
+    return mask
+
+
+# =========================== 여러 색상 규칙 (LUT) ===========================
+# 규칙마다 프레임을 따로 훑지 않고, 채널별 룩업 테이블에 "이 값이면 맞는 규칙들" 비트를
+# 미리 넣어둔다.  bits = lut_r[R] & lut_g[G] & lut_b[B]  -> 픽셀당 규칙 비트마스크 (한 번에)
+# color  : (r, g, b)
+# tol    : 채널별 허용오차
+# action : 이 규칙으로 인식됐을 때 두 번째 클릭 좌표 (None 이면 기본 좌표)
+ColorRule = namedtuple("ColorRule", "color tol action name", defaults=(None, None))
+
+
+def parse_color(text):
+    # "#rrggbb" / "rrggbb" -> (r, g, b)
+    text = text.lstrip("#")
+    return tuple(int(text[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def rule_to_dict(rule):
+    # 설정 파일(json)용. parse_rule 의 반대
+    return {"color": list(rule.color), "tol": rule.tol,
+            "action": list(rule.action) if rule.action else None, "name": rule.name}
+
+
+def parse_rule(item):
+    color = item["color"]
+    if isinstance(color, str):
+        color = parse_color(color)
+    return ColorRule(tuple(color), item["tol"],
+                     tuple(item["action"]) if item.get("action") else None, item.get("name"))
+
+_BIT_DTYPES = ((8, np.uint8), (16, np.uint16), (32, np.uint32), (64, np.uint64))
+
+
+class RuleSet:
+    def __init__(self, rules):
+        self.rules = tuple(rules)
+        if not self.rules:
+            raise ValueError("규칙이 하나 이상 있어야 함")
+        for bits, dtype in _BIT_DTYPES:
+            if len(self.rules) <= bits:
+                self.dtype = dtype
+                break
+        else:
+            raise ValueError(f"규칙은 최대 {_BIT_DTYPES[-1][0]}개까지")
+
+        # 채널별 256칸 LUT (R, G, B 순서)
+        values = np.arange(256)
+        self.luts = [np.zeros(256, dtype=self.dtype) for _ in range(3)]
+        for k, rule in enumerate(self.rules):
+            bit = self.dtype(1) << self.dtype(k)
+            for lut, c in zip(self.luts, rule.color):
+                lut[np.abs(values - int(c)) <= int(rule.tol)] |= bit
+        self._bits = None
+        self._tmp = None
+
+    def match(self, frame):
+        # 픽셀당 규칙 비트마스크 (버퍼 재사용, 다음 호출 때 덮어써짐)
+        shape = frame.shape[:2]
+        if self._bits is None or self._bits.shape != shape:
+            self._bits = np.empty(shape, dtype=self.dtype)
+            self._tmp = np.empty(shape, dtype=self.dtype)
+        lut_r, lut_g, lut_b = self.luts
+        np.take(lut_r, frame[..., R], out=self._bits)
+        self._bits &= np.take(lut_g, frame[..., G], out=self._tmp)
+        self._bits &= np.take(lut_b, frame[..., B], out=self._tmp)
+        return self._bits
+
+    def present(self, bits):
+        # 프레임 어딘가에서 한 번이라도 맞은 규칙 번호들
+        seen = int(np.bitwise_or.reduce(bits, axis=None)) if bits.size else 0
+        return [k for k in range(len(self.rules)) if seen >> k & 1]
+
+    def hit_maps(self, bits):
+        # {규칙 번호: bool 마스크} - 맞은 규칙만
+        return {k: (bits & self.dtype(1 << k)) != 0 for k in self.present(bits)}
+
+
+# =========================== Blob 라벨링 ===========================
+# 마스크를 행 단위 run(연속 구간)으로 보고 union-find 로 묶는다 (4-연결).
+# 픽셀 목록은 만들지 않고, blob 마다 bbox / top-left / 넓이만 유지.
+class Blob:
+    __slots__ = ("top_left", "min_x", "min_y", "max_x", "max_y", "area")
+
+    def __init__(self, top_left, min_x, min_y, max_x, max_y, area):
+        self.top_left = top_left  # (x, y) : 가장 위 줄의 가장 왼쪽 픽셀
+        self.min_x, self.min_y = min_x, min_y
+        self.max_x, self.max_y = max_x, max_y
+        self.area = area
+
+    @property
+    def center(self):
+        return ((self.min_x + self.max_x) // 2, (self.min_y + self.max_y) // 2)
+
+    @property
+    def bbox(self):
+        return (self.min_x, self.min_y, self.max_x, self.max_y)
+
+    def __repr__(self):
+        return f"Blob(top_left={self.top_left}, bbox={self.bbox}, area={self.area})"
+
+
+def iter_row_runs(mask, band=64):
+    # (y, starts, ends) 를 위에서부터 생성 (end 는 미포함). 빈 줄도 yield.
+    # band 줄씩 벡터 연산 -> 조기 종료 시 아래쪽은 계산하지 않는다
+    h, w = mask.shape
+    padded = np.zeros((min(band, h), w + 2), dtype=bool)
+    for y0 in range(0, h, band):
+        sub = mask[y0:y0 + band]
+        n = sub.shape[0]
+        pad = padded[:n]
+        pad[:, 1:-1] = sub
+        edges = pad[:, 1:] != pad[:, :-1]
+        ys, xs = np.nonzero(edges)
+        rows = ys[0::2]
+        starts = xs[0::2].tolist()
+        ends = xs[1::2].tolist()
+        cuts = np.searchsorted(rows, np.arange(n + 1)).tolist()
+        for k in range(n):
+            a, b = cuts[k], cuts[k + 1]
+            yield y0 + k, starts[a:b], ends[a:b]
+
+
+def label_blobs(mask, border=0, first_only=False, min_area=0, min_size=0):
+    # border 안쪽 픽셀을 하나라도 포함한 blob 만 유효 (기존 BFS 시작점 조건과 동일).
+    # min_area / min_size 보다 작은 blob(안티앨리어싱 점 등)은 버린다 (0 이면 전부 유효).
+    # 반환: top-left (y -> x) 순으로 정렬된 Blob 목록.
+    # first_only=True 이면 가장 위/왼쪽 blob 이 확정되는 순간 멈추고 그것만 반환.
+    return label_runs(iter_row_runs(mask), mask.shape, border, first_only, min_area, min_size)
+
+
+def label_runs(row_runs, shape, border=0, first_only=False, min_area=0, min_size=0):
+    # label_blobs 본체. row_runs: 위에서부터 (y, starts, ends) - 빈 줄은 생략해도 됨
+    # (캐시해 둔 run 을 그대로 넣을 수 있게 분리. 좌표는 shape 기준 절대 좌표)
+    h, w = shape
+    x_lo, x_hi = border, w - border
+    y_lo, y_hi = border, h - border
+
+    parent = []
+    top = []      # (y, x) - 정렬 키
+    min_x, max_x, max_y, area, valid = [], [], [], [], []
+
+    def find(c):
+        root = c
+        while parent[root] != root:
+            root = parent[root]
+        while parent[c] != root:
+            parent[c], c = root, parent[c]
+        return root
+
+    def union(a, b):
+        if a == b:
+            return a
+        if top[b] < top[a]:
+            a, b = b, a
+        parent[b] = a
+        min_x[a] = min(min_x[a], min_x[b])
+        max_x[a] = max(max_x[a], max_x[b])
+        max_y[a] = max(max_y[a], max_y[b])
+        area[a] += area[b]
+        valid[a] = valid[a] or valid[b]
+        return a
+
+    done = []     # 확정된 유효 blob 의 root
+    best = None   # first_only: 확정된 blob 중 가장 위/왼쪽 top
+    prev = []     # 이전 줄 run: (start, end, comp)
+    last_y = -2
+
+    def keep(r):
+        return (valid[r] and area[r] >= min_area
+                and max_x[r] - min_x[r] + 1 >= min_size
+                and max_y[r] - top[r][0] + 1 >= min_size)
+
+    def close_row(prev, cur):
+        # 이번 줄에 이어지지 않은 blob 은 더 이상 커질 수 없음 -> 확정
+        nonlocal best
+        alive = {find(c) for _, _, c in cur}
+        for r in {find(c) for _, _, c in prev} - alive:
+            if keep(r):
+                done.append(r)
+                if best is None or top[r] < best:
+                    best = top[r]
+        # 살아있는 blob 들이 모두 best 보다 아래/오른쪽이면 더 볼 필요 없음
+        return first_only and best is not None and all(top[r] > best for r in alive)
+
+    for y, starts, ends in row_runs:
+        if prev and y != last_y + 1:
+            # 줄이 건너뛰어짐 = 빈 줄 -> 이전 줄 blob 확정
+            stop = close_row(prev, [])
+            prev = []
+            if stop:
+                break
+        last_y = y
+        if not starts and not prev:
+            continue
+        cur = []
+        inner_row = y_lo <= y < y_hi and x_lo < x_hi
+        j = 0
+        for s, e in zip(starts, ends):
+            while j < len(prev) and prev[j][1] <= s:
+                j += 1
+            comp = None
+            k = j
+            while k < len(prev) and prev[k][0] < e:
+                r = find(prev[k][2])
+                comp = r if comp is None else union(comp, r)
+                k += 1
+            if comp is None:
+                comp = len(parent)
+                parent.append(comp)
+                top.append((y, s))
+                min_x.append(s)
+                max_x.append(e - 1)
+                max_y.append(y)
+                area.append(0)
+                valid.append(False)
+            else:
+                if s < min_x[comp]: min_x[comp] = s
+                if e - 1 > max_x[comp]: max_x[comp] = e - 1
+                max_y[comp] = y
+            area[comp] += e - s
+            if inner_row and s < x_hi and e > x_lo:
+                valid[comp] = True
+            cur.append((s, e, comp))
+
+        stop = close_row(prev, cur)
+        prev = cur
+        if stop:
+            break
+    else:
+        for r in {find(c) for _, _, c in prev}:
+            if keep(r):
+                done.append(r)
+
+    done.sort(key=lambda r: top[r])
+    if first_only:
+        done = done[:1]
+    return [Blob((top[r][1], top[r][0]), min_x[r], top[r][0], max_x[r], max_y[r], area[r])
+            for r in done]
+
+
+def find_top_left_blob(mask, border=0, min_area=0, min_size=0):
+    # 가장 위, 왼쪽에 있는 blob (없으면 None)
+    blobs = label_blobs(mask, border, True, min_area, min_size)
+    return blobs[0] if blobs else None
+
+
+# =========================== 성긴 -> 정밀 탐색 ===========================
+# 버튼/좌석은 수십 픽셀짜리라 모든 픽셀을 볼 필요가 없다.
+#  1) stride 간격으로 찍은 점들만 매칭 (픽셀 수 1/stride^2)
+#  2) 맞은 점 덩어리마다 주변 창(window)만 원래 해상도로 매칭/라벨링 -> 정확한 blob 경계
+#  3) blob 이 창 가장자리에 닿으면 창을 넓혀서 다시 (blob 이 창 밖으로 이어질 수 있음)
+# stride x stride 로 꽉 찬 부분이 있는 blob 은 반드시 샘플 점에 걸리고, 그 blob 의 나머지
+# (샘플 점 사이로 빠지는 가는 줄 등)는 3) 에서 창을 넓혀 다 잡는다.
+# -> 그런 blob 만 찾으면 되는 화면(버튼/좌석)에서는 전체 검사와 같은 결과.
+#    bbox 만 크고 가는 줄로만 된 blob 은 min_size >= stride 여도 놓칠 수 있다.
+def _window_blobs(frame, color, tol, border, x0, y0, x1, y1, min_area, min_size):
+    h, w = frame.shape[:2]
+    while True:
+        mask = match_mask(frame[y0:y1, x0:x1], color, tol)
+        runs = ((y0 + y, [x0 + v for v in s], [x0 + v for v in e])
+                for y, s, e in iter_row_runs(mask) if s)
+        # 창 가장자리 검사 때문에 여기서는 크기 필터 없이 전부 라벨링
+        blobs = label_runs(runs, (h, w), border)
+        grow = False
+        for b in blobs:
+            if ((b.min_x == x0 and x0 > 0) or (b.max_x == x1 - 1 and x1 < w)
+                    or (b.min_y == y0 and y0 > 0) or (b.max_y == y1 - 1 and y1 < h)):
+                grow = True
+                break
+        if not grow:
+            return [b for b in blobs
+                    if b.area >= min_area
+                    and b.max_x - b.min_x + 1 >= min_size
+                    and b.max_y - b.min_y + 1 >= min_size]
+        mx, my = max(x1 - x0, 8), max(y1 - y0, 8)
+        x0, y0 = max(x0 - mx, 0), max(y0 - my, 0)
+        x1, y1 = min(x1 + mx, w), min(y1 + my, h)
+
+
+def coarse_find_top_left_blob(frame, color, tol, border=0, stride=4,
+                              min_area=0, min_size=0, max_windows=64):
+    if stride <= 1:
+        return find_top_left_blob(match_mask(frame, color, tol), border, min_area, min_size)
+    h, w = frame.shape[:2]
+    coarse = match_mask(frame[::stride, ::stride], color, tol)
+    if not coarse.any():
+        return None
+    cands = label_blobs(coarse)
+    if len(cands) > max_windows:
+        # 후보가 너무 많으면(노이즈 많은 화면) 창 여러 개보다 전체 한 번이 빠름
+        return find_top_left_blob(match_mask(frame, color, tol), border, min_area, min_size)
+
+    best = None
+    seen = set()
+    for c in cands:
+        x0, y0 = max((c.min_x - 1) * stride, 0), max((c.min_y - 1) * stride, 0)
+        x1, y1 = min((c.max_x + 2) * stride, w), min((c.max_y + 2) * stride, h)
+        # 창이 아래에서 시작해도 넓히다 보면 위로 뻗은 가는 줄이 붙을 수 있어서 전부 봄
+        for b in _window_blobs(frame, color, tol, border, x0, y0, x1, y1, min_area, min_size):
+            if b.top_left in seen:
+                continue
+            seen.add(b.top_left)
+            if best is None or (b.top_left[1], b.top_left[0]) < (best.top_left[1], best.top_left[0]):
+                best = b
+    return best
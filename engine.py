@@ -0,0 +1,155 @@
+import time
+from collections import namedtuple
+
+from detector import ColorMatcher, RuleSet, Blob, find_top_left_blob, coarse_find_top_left_blob
+from incremental import IncrementalMatcher
+from parallel import ParallelMatcher
+
+# =========================== 인식 엔진 (UI 없음) ===========================
+# Tk / pyautogui / keyboard / windll 과 무관 -> 리눅스에서도 import, 벤치, 테스트 가능.
+# 프레임은 capture.py 의 소스(CaptureSession, ArraySource, ImageFileSource,
+# SequenceSource) 중 아무거나에서 받는다.
+#
+#   from capture import ImageFileSource
+#   from engine import DetectionEngine
+#   eng = DetectionEngine(ImageFileSource("찰칵_20250101_120000.png"), (255, 0, 0), 40, border=4)
+#   print(eng.step())
+
+# pos  : 클릭할 화면 좌표 (blob 중앙)
+# blob : detector.Blob (프레임 기준 좌표)
+# rule : 맞은 detector.ColorRule (규칙 모드일 때만, 단일 색상이면 None)
+# score: 템플릿 매칭 점수 (템플릿 모드일 때만)
+# region: 여러 영역 감시일 때 인식된 영역 이름 (regions.WatchRegion.name)
+Detection = namedtuple("Detection", "pos blob rule score region", defaults=(None, None, None))
+
+
+class DetectionEngine:
+    def __init__(self, source=None, color=(255, 0, 0), tol=40, border=0, rules=None,
+                 incremental=False, tile=64, stride=1, min_area=0, min_size=0, workers=1,
+                 template=None):
+        self.source = source
+        self.color = color
+        self.tol = tol
+        self.border = border
+        self.rules = rules   # ColorRule 목록이 있으면 색상 하나 대신 규칙 모드
+        self.template = template  # template.TemplateMatcher 가 있으면 색 대신 패치 모양으로 찾음
+        # 이보다 작은 blob 은 무시 (넓이 px, 가로/세로 px)
+        self.min_area = min_area
+        self.min_size = min_size
+        # 1 보다 크면 stride 간격 성긴 탐색 후 주변만 정밀 탐색 (min_size >= stride 권장)
+        self.stride = stride
+        self.matcher = ColorMatcher()
+        self._ruleset = None
+        # 바뀐 타일만 다시 보는 모드 (단일 색상일 때)
+        self.incremental = IncrementalMatcher(tile) if incremental else None
+        # workers > 1 이면 band 단위 멀티스레드 전체 검사 (incremental 이 켜져 있으면 그쪽 우선)
+        self.parallel = ParallelMatcher(workers) if workers and workers > 1 else None
+        # 마지막 detect 의 단계별 시간 (ms). stride/병렬은 매칭과 묶기가 섞여서 match 에 합산
+        self.timings = {}
+        # 마지막 detect 가 incremental 경로였으면 화면이 그대로였는지 (True/False), 아니면 None
+        self.unchanged = None
+
+    def detect(self, frame, mon=None, color=None, tol=None, rules=None, template=None):
+        # 프레임 한 장에서 가장 위, 왼쪽 blob 을 찾는다. 없으면 None
+        self.unchanged = None
+        template = self.template if template is None else template
+        if template is not None:
+            return self._detect_template(frame, mon, template)
+        rules = self.rules if rules is None else rules
+        if rules:
+            return self._detect_rules(frame, mon, rules)
+        color = self.color if color is None else color
+        tol = self.tol if tol is None else tol
+        t0 = time.perf_counter()
+        t1 = None
+        if self.stride > 1:
+            blob = coarse_find_top_left_blob(frame, color, tol, self.border, self.stride,
+                                             self.min_area, self.min_size)
+        elif self.incremental is not None:
+            self.unchanged = self.incremental.update(frame, color, tol) == 0
+            t1 = time.perf_counter()
+            blob = self.incremental.find_top_left_blob(self.border, self.min_area, self.min_size)
+        elif self.parallel is not None:
+            blob = self.parallel.find_top_left_blob(frame, color, tol, self.border,
+                                                    self.min_area, self.min_size)
+        else:
+            mask = self.matcher.match(frame, color, tol)
+            t1 = time.perf_counter()
+            blob = find_top_left_blob(mask, self.border, self.min_area, self.min_size)
+        self._timed(t0, t1)
+        if blob is None:
+            return None
+        return self._result(blob, mon)
+
+    def _detect_rules(self, frame, mon, rules):
+        # 규칙 전체를 한 번에 매칭 -> 맞은 규칙별로 가장 위/왼쪽 blob -> 그중 가장 위/왼쪽
+        # (같은 위치면 목록에서 앞에 있는 규칙 우선)
+        rules = tuple(rules)
+        if self._ruleset is None or self._ruleset.rules != rules:
+            self._ruleset = RuleSet(rules)
+        ruleset = self._ruleset
+        best = None
+        t0 = time.perf_counter()
+        hit_maps = ruleset.hit_maps(ruleset.match(frame))
+        t1 = time.perf_counter()
+        for k, mask in hit_maps.items():
+            blob = find_top_left_blob(mask, self.border, self.min_area, self.min_size)
+            if blob is None:
+                continue
+            key = (blob.top_left[1], blob.top_left[0], k)
+            if best is None or key < best[0]:
+                best = (key, blob, ruleset.rules[k])
+        self._timed(t0, t1)
+        if best is None:
+            return None
+        return self._result(best[1], mon, best[2])
+
+    def _detect_template(self, frame, mon, template):
+        # 테두리 안쪽만 보고, 가장 점수 높은 위치 (threshold 이상)
+        t0 = time.perf_counter()
+        b = self.border
+        inner = frame[b:frame.shape[0] - b, b:frame.shape[1] - b] if b else frame
+        found = template.find(inner)
+        self._timed(t0)
+        if found is None:
+            return None
+        x, y, score = found
+        x, y = x + b, y + b
+        w, h = template.width, template.height
+        blob = Blob((x, y), x, y, x + w - 1, y + h - 1, w * h)
+        return self._result(blob, mon)._replace(score=score)
+
+    def _timed(self, t0, t1=None):
+        # t0 ~ t1 매칭, t1 ~ 지금 묶기 (t1 이 없으면 전부 매칭)
+        t2 = time.perf_counter()
+        if t1 is None:
+            self.timings = {"match_ms": (t2 - t0) * 1000}
+        else:
+            self.timings = {"match_ms": (t1 - t0) * 1000, "label_ms": (t2 - t1) * 1000}
+
+    @staticmethod
+    def _result(blob, mon, rule=None):
+        left, top = (mon["left"], mon["top"]) if mon else (0, 0)
+        cx, cy = blob.center
+        return Detection((left + cx, top + cy), blob, rule)
+
+    def close(self):
+        if self.parallel is not None:
+            self.parallel.close()
+
+    def step(self):
+        # 소스에서 한 장 받아서 인식 -> (frame, mon, Detection or None), 소스가 끝나면 None
+        mon = self.source.region
+        frame = self.source.grab(mon)
+        if frame is None:
+            return None
+        return frame, mon, self.detect(frame, mon)
+
+    def run(self, max_frames=None):
+        n = 0
+        while max_frames is None or n < max_frames:
+            result = self.step()
+            if result is None:
+                return
+            yield result
+            n += 1
@@ -0,0 +1,128 @@
+import glob
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# =========================== 스크린샷(증거) 저장 ===========================
+# 클릭 경로에서 PNG 인코딩을 빼기 위해 저장은 전용 스레드에서 처리.
+# 큐가 꽉 차면 새 요청은 버린다 -> 클릭/감시 쪽은 절대 기다리지 않음.
+# keep 을 주면 폴더의 스크린샷(pattern)을 최근 keep 개만 남기고 오래된 것부터 지움
+# (연속 감시로 몇 시간 돌려도 디스크가 안 차도록. 이전에 실행했을 때 남은 파일도 포함).
+
+
+def frame_to_image(frame):
+    # (h, w, 4) BGRA 배열 -> PIL RGB 이미지 (디코더가 바로 읽음, 중간 복사 없음)
+    # PIL 은 첫 저장 때 (저장 스레드에서) import -> 시작 시간에서 빠짐
+    from PIL import Image
+    if not frame.flags.c_contiguous:
+        # 여러 영역 감시의 영역 view (큰 캡처에서 잘라낸 것) -> 여기서만 복사
+        frame = np.ascontiguousarray(frame)
+    return Image.frombuffer("RGB", (frame.shape[1], frame.shape[0]), frame,
+                            "raw", "BGRX", 0, 1)
+
+
+class EvidenceWriter:
+    def __init__(self, directory=".", maxsize=16, keep=None, pattern="찰칵_*.png"):
+        self.directory = directory
+        self.keep = keep
+        self.pattern = pattern
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, frame, name):
+        # 저장 예약. 큐가 꽉 찼으면 False
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait((frame, name))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="evidence", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            frame, name = item
+            path = os.path.join(self.directory, name)
+            try:
+                frame_to_image(frame).save(path)
+                print(f"스크린샷 저장됨: {path}")
+            except Exception as e:
+                print(f"스크린샷 저장 실패: {path} ({e})")
+                continue
+            self._prune()
+
+    def _prune(self):
+        # 수정 시각 순으로 오래된 것부터. 파일 수백 개 수준이라 저장할 때마다 폴더를 다시 봄
+        if self.keep is None:
+            return
+        paths = []
+        for path in glob.glob(os.path.join(glob.escape(self.directory), self.pattern)):
+            try:
+                paths.append((os.path.getmtime(path), path))
+            except OSError:
+                pass
+        paths.sort()
+        for _, old in paths[:max(len(paths) - self.keep, 0)]:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+    def close(self, timeout=2.0):
+        # 남은 저장 요청은 최대 timeout 초까지 처리하고 종료
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+
+class FrameRing:
+    # 최근 N 프레임을 메모리에 보관 (트리거 직전 상황 확인용). size=0 이면 꺼짐
+    # 캡처마다 새 버퍼가 오므로 복사 없이 참조만 들고 있는다
+    def __init__(self, size=0):
+        self._frames = deque(maxlen=max(size, 1))
+        self.size = size
+
+    def push(self, frame, t):
+        if self.size > 0:
+            self._frames.append((t, frame))
+
+    def snapshot(self):
+        return list(self._frames) if self.size > 0 else []
+
+    def clear(self):
+        self._frames.clear()
+
+
+def save_trigger(writer, frame, t_trigger, ring=None, prefix="찰칵"):
+    # 트리거 프레임 + (있으면) 링 버퍼의 앞뒤 프레임을 저장 예약. 트리거 파일명 반환
+    # 연속 감시에서는 1초 안에 여러 번 인식될 수 있어서 밀리초까지 붙임
+    now = time.time()
+    timestamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(now)) + f"_{int(now * 1000) % 1000:03d}"
+    name = f"{prefix}_{timestamp}.png"
+    writer.submit(frame, name)
+    if ring is not None:
+        for t, f in ring.snapshot():
+            if f is frame:
+                continue
+            dt_ms = int(round((t - t_trigger) * 1000))
+            writer.submit(f, f"{prefix}_{timestamp}_{dt_ms:+05d}ms.png")
+    return name
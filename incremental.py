@@ -0,0 +1,118 @@
+import numpy as np
+
+from detector import ColorMatcher, match_mask, iter_row_runs, label_runs
+
+# =========================== 변경 타일만 다시 보기 ===========================
+# 대부분의 tick 은 화면이 그대로다. 감시 영역을 tile x tile 칸으로 나눠서
+#  1) 이전 프레임과 달라진 타일만 찾고 (픽셀을 uint32 하나로 보고 비교)
+#  2) 달라진 타일만 마스크를 다시 계산
+#  3) 달라진 타일이 속한 줄 묶음(band)만 run 을 다시 뽑고, 나머지는 캐시 재사용
+#  4) run 전체를 union-find 로 다시 묶음 -> 타일 경계를 넘는 blob 도 그대로 합쳐짐
+# 아무 타일도 안 바뀌었으면 이전 결과를 그대로 돌려준다 (비교 한 번이 전부).
+# 프레임은 캡처마다 새 버퍼라서 이전 프레임은 복사 없이 참조만 유지.
+# (그래서 같은 배열을 제자리에서 고쳐서 다시 넣으면 변경을 못 본다)
+
+
+def _as_u32(frame):
+    # (h, w, 4) uint8 -> (h, w) uint32 view (픽셀 하나 = 정수 하나)
+    try:
+        return frame.view(np.uint32)[..., 0]
+    except ValueError:
+        return np.ascontiguousarray(frame).view(np.uint32)[..., 0]
+
+
+def _rows_u64(px):
+    # (h, w) uint32 -> 가능하면 (h, w/2) uint64 (줄 단위 비교를 절반 횟수로)
+    if px.shape[1] % 2 == 0 and px.flags.c_contiguous:
+        return px.view(np.uint64)
+    return px
+
+
+class IncrementalMatcher:
+    def __init__(self, tile=64, full_ratio=0.5):
+        self.tile = tile
+        self.full_ratio = full_ratio  # 이 비율 이상 바뀌면 타일별 대신 통째로 다시 계산
+        self._matcher = ColorMatcher()
+        self.reset()
+
+    def reset(self):
+        self._key = None
+        self._prev = None
+        self._mask = None
+        self._bands = None     # band 별 [(y, starts, ends), ...] (빈 줄 제외)
+        self._result = None    # 마지막 라벨링 결과 캐시
+        self.changed_tiles = 0
+        self.total_tiles = 0
+
+    def _grid(self, h, w):
+        t = self.tile
+        return np.arange(0, h, t), np.arange(0, w, t)
+
+    def _band_runs(self, y0):
+        sub = self._mask[y0:y0 + self.tile]
+        return [(y0 + y, s, e) for y, s, e in iter_row_runs(sub, band=self.tile) if s]
+
+    def update(self, frame, color, tol):
+        # 마스크/run 캐시 갱신. 바뀐 타일 수 반환 (0 이면 결과 재사용 가능)
+        h, w = frame.shape[:2]
+        ys, xs = self._grid(h, w)
+        self.total_tiles = len(ys) * len(xs)
+        key = (tuple(color), tol, h, w)
+        cur = _as_u32(frame)
+
+        if key != self._key or self._prev is None:
+            changed = None
+        else:
+            # 먼저 줄 단위로 바뀐 줄만 찾고, 바뀐 band 안에서만 타일 단위로 나눈다
+            rows = (_rows_u64(cur) != _rows_u64(self._prev)).any(axis=1)
+            if not rows.any():
+                self._prev = cur
+                self.changed_tiles = 0
+                return 0
+            t = self.tile
+            changed = np.zeros((len(ys), len(xs)), dtype=bool)
+            for by in np.flatnonzero(np.logical_or.reduceat(rows, ys)).tolist():
+                y0 = by * t
+                cols = (cur[y0:y0 + t] != self._prev[y0:y0 + t]).any(axis=0)
+                changed[by] = np.logical_or.reduceat(cols, xs)
+            if changed.sum() >= self.full_ratio * self.total_tiles:
+                changed = None
+
+        t = self.tile
+        if changed is None:
+            # 처음이거나 설정/크기 변경, 또는 대부분 바뀜 -> 전체 다시
+            # 전체 마스크 버퍼는 이 matcher 전용 -> 타일 갱신은 여기에 직접 씀
+            self._mask = self._matcher.match(frame, color, tol)
+            self._bands = [self._band_runs(y0) for y0 in ys.tolist()]
+            self.changed_tiles = self.total_tiles
+        else:
+            for by, bx in np.argwhere(changed).tolist():
+                y0, x0 = by * t, bx * t
+                tile = frame[y0:y0 + t, x0:x0 + t]
+                self._mask[y0:y0 + t, x0:x0 + t] = match_mask(tile, color, tol)
+            for by in np.flatnonzero(changed.any(axis=1)).tolist():
+                self._bands[by] = self._band_runs(by * t)
+            self.changed_tiles = int(changed.sum())
+
+        self._key = key
+        self._prev = cur
+        self._result = None
+        return self.changed_tiles
+
+    def row_runs(self):
+        for band in self._bands:
+            yield from band
+
+    def blobs(self, border=0, first_only=False, min_area=0, min_size=0):
+        # update 이후 라벨링. 화면이 그대로면 캐시된 결과
+        cache_key = (border, first_only, min_area, min_size)
+        if self._result is not None and self._result[0] == cache_key:
+            return self._result[1]
+        blobs = label_runs(self.row_runs(), self._mask.shape, border, first_only,
+                           min_area, min_size)
+        self._result = (cache_key, blobs)
+        return blobs
+
+    def find_top_left_blob(self, border=0, min_area=0, min_size=0):
+        blobs = self.blobs(border, True, min_area, min_size)
+        return blobs[0] if blobs else None
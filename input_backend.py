@@ -0,0 +1,161 @@
+import ctypes
+import sys
+import time
+from collections import deque
+
+# =========================== 입력(클릭) 백엔드 ===========================
+# DirectInput    : 윈도우 SendInput 직접 호출 (숨은 대기 없음)
+# PyAutoGuiInput : 기존 방식 (pyautogui.PAUSE 0.1초는 끄고 호출)
+# RecordingInput : 실제 클릭 없이 기록만 (테스트/벤치용)
+# 모든 백엔드는 동작마다 perf_counter 시각을 log 에 남긴다.
+
+
+class InputBackend:
+    name = "base"
+
+    def __init__(self, log_size=1000):
+        self.log = deque(maxlen=log_size)  # (시각, 동작, x, y)
+
+    def click(self, x, y):
+        # 클릭이 OS 로 넘어간 시각을 반환
+        x, y = int(x), int(y)
+        self._click(x, y)
+        t = time.perf_counter()
+        self.log.append((t, "click", x, y))
+        return t
+
+    def _click(self, x, y):
+        raise NotImplementedError
+
+    def position(self):
+        raise NotImplementedError
+
+
+# ---- 윈도우 SendInput ----
+_INPUT_MOUSE = 0
+_MOUSEEVENTF_LEFTDOWN = 0x0002
+_MOUSEEVENTF_LEFTUP = 0x0004
+
+
+class _MOUSEINPUT(ctypes.Structure):
+    _fields_ = [("dx", ctypes.c_long),
+                ("dy", ctypes.c_long),
+                ("mouseData", ctypes.c_ulong),
+                ("dwFlags", ctypes.c_ulong),
+                ("time", ctypes.c_ulong),
+                ("dwExtraInfo", ctypes.c_size_t)]
+
+
+class _INPUT(ctypes.Structure):
+    # 원래는 union 이지만 MOUSEINPUT 이 가장 커서 크기가 같다
+    _fields_ = [("type", ctypes.c_ulong),
+                ("mi", _MOUSEINPUT)]
+
+
+class _POINT(ctypes.Structure):
+    _fields_ = [("x", ctypes.c_long), ("y", ctypes.c_long)]
+
+
+class DirectInput(InputBackend):
+    name = "direct"
+
+    def __init__(self, log_size=1000):
+        super().__init__(log_size)
+        self._user32 = ctypes.windll.user32
+        # 누르기/떼기 두 이벤트를 미리 만들어 두고 매번 재사용
+        self._events = (_INPUT * 2)()
+        for ev, flag in zip(self._events, (_MOUSEEVENTF_LEFTDOWN, _MOUSEEVENTF_LEFTUP)):
+            ev.type = _INPUT_MOUSE
+            ev.mi.dwFlags = flag
+        self._size = ctypes.sizeof(_INPUT)
+        self._pt = _POINT()
+
+    def _click(self, x, y):
+        self._user32.SetCursorPos(x, y)
+        self._user32.SendInput(2, self._events, self._size)
+
+    def position(self):
+        self._user32.GetCursorPos(ctypes.byref(self._pt))
+        return self._pt.x, self._pt.y
+
+
+class PyAutoGuiInput(InputBackend):
+    name = "pyautogui"
+
+    def __init__(self, log_size=1000):
+        super().__init__(log_size)
+        import pyautogui
+        self._pg = pyautogui
+
+    def _click(self, x, y):
+        # _pause=False : 호출마다 붙는 PAUSE(기본 0.1초) 대기 제거
+        self._pg.click(x, y, _pause=False)
+
+    def position(self):
+        x, y = self._pg.position()
+        return int(x), int(y)
+
+
+class RecordingInput(InputBackend):
+    name = "recording"
+
+    def __init__(self, log_size=1000, pos=(0, 0)):
+        super().__init__(log_size)
+        self.pos = pos
+
+    def _click(self, x, y):
+        self.pos = (x, y)
+
+    def position(self):
+        return self.pos
+
+
+def default_backend():
+    if sys.platform == "win32":
+        return DirectInput()
+    return PyAutoGuiInput()
+
+
+# =========================== 정밀 대기 / 클릭 시퀀스 ===========================
+def wait_until(deadline, stop=None, spin=0.002):
+    # deadline(perf_counter) 까지 대기. 대부분은 sleep, 마지막 spin 초만 busy-wait.
+    # stop(Event) 이 set 되면 False 반환
+    while True:
+        remain = deadline - time.perf_counter()
+        if remain <= 0:
+            return True
+        if stop is not None and stop.is_set():
+            return False
+        if remain > spin:
+            if stop is not None:
+                stop.wait(remain - spin)
+            else:
+                time.sleep(remain - spin)
+
+
+def run_click_sequence(backend, steps, stop=None):
+    # steps: [(직전 클릭 후 대기 초, x, y), ...]  첫 항목의 대기는 호출 시점 기준
+    # 반환: 각 클릭 시각 목록 (중간에 stop 되면 거기까지만)
+    times = []
+    t_prev = time.perf_counter()
+    for gap, x, y in steps:
+        if gap > 0 and not wait_until(t_prev + gap, stop):
+            break
+        t_prev = backend.click(x, y)
+        times.append(t_prev)
+    return times
+
+
+def latency_report(t_grab, t_detect, click_times):
+    # 캡처 시작 / 인식 완료 / 각 클릭 시각 -> ms 단위 요약
+    report = {
+        "analyze_ms": (t_detect - t_grab) * 1000,
+        "detect_to_click_ms": None,
+        "grab_to_click_ms": None,
+        "gaps_ms": [],
+    }
+    if click_times:
+        report["detect_to_click_ms"] = (click_times[0] - t_detect) * 1000
+        report["grab_to_click_ms"] = (click_times[0] - t_grab) * 1000
+        report["gaps_ms"] = [(b - a) * 1000 for a, b in zip(click_times, click_times[1:])]
+    return report
@@ -0,0 +1,109 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from detector import match_into, label_runs
+
+# =========================== 멀티코어 band 분할 인식 ===========================
+# 프레임을 가로 band 여러 개로 잘라서 스레드 풀에서 동시에
+#   마스크 계산 + run 경계(시작/끝 x) 찾기
+# 를 하고, band 결과를 위에서부터 순서대로 이어서 union-find 로 묶는다.
+# band 쪽 일은 전부 NumPy 배열 연산(ufunc, nonzero)이라 GIL 을 놓고 진짜 병렬로 돈다.
+# 파이썬 목록으로 바꾸는 일(tolist)과 묶기는 GIL 이 필요해서 호출한 스레드에서 위에서부터
+# 조금씩 하고, 가장 위/왼쪽 blob 이 확정되면 거기서 멈춘다 (아래쪽 run 은 목록으로 안 바꿈).
+# band 경계를 넘는 blob 은 묶는 단계에서 위/아래 run 이 이어지며 합쳐짐
+# -> 결과(가장 위/왼쪽 blob, 중앙)는 직렬 처리와 같다.
+# 프로세스 풀 대신 스레드: 프레임/마스크를 공유 메모리처럼 그대로 나눠 쓰고 복사/직렬화가 없음.
+#
+# band 는 한꺼번에 시작하므로 위쪽에서 답이 나와도 아래 band 의 마스크/경계 계산은 끝까지 돈다.
+# 그래서 코어가 1개면 직렬보다 빠를 수 없다 (bench_detect.py --workers N 으로 그 PC 에서 확인).
+# 코어 1개 환경에서 잰 값 (4K, bench_detect.py --workers 2):
+#  - detect 직렬 38~64ms, workers=2 44~48ms (blob 이 아래쪽이면 직렬의 줄 단위 루프가 더 느림)
+#  - band 계산 중 다른 파이썬 스레드가 CPU 의 약 40% 를 씀 -> 그동안 GIL 을 놓고 있다는 뜻,
+#    코어가 더 있으면 band 들이 겹쳐서 돈다.
+
+
+class ParallelMatcher:
+    def __init__(self, workers=None, min_band=32):
+        self.workers = max(int(workers or os.cpu_count() or 1), 1)
+        self.min_band = min_band  # band 가 너무 얇으면 스레드 비용이 더 큼
+        self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="band")
+        self._shape = None
+        self._mask = self._tmp = self._diff = None
+
+    def _buffers(self, shape):
+        # band 들이 같은 버퍼의 서로 다른 줄 구간에 씀 (겹치지 않음)
+        if self._shape != shape:
+            h, w = shape
+            self._shape = shape
+            self._mask = np.empty(shape, dtype=bool)
+            self._tmp = np.empty(shape, dtype=bool)
+            self._diff = np.empty(shape, dtype=np.uint8)
+            # 양쪽에 False 한 칸씩 -> 줄마다 값이 바뀌는 곳이 run 의 시작/끝
+            self._pad = np.zeros((h, w + 2), dtype=bool)
+            self._edges = np.empty((h, w + 1), dtype=bool)
+
+    def bands(self, h):
+        n = max(min(self.workers, h // self.min_band), 1)
+        cuts = [h * k // n for k in range(n + 1)]
+        return list(zip(cuts[:-1], cuts[1:]))
+
+    def _band(self, frame, color, tol, y0, y1):
+        # (y0, rows, starts, ends) - 전부 NumPy 배열, rows 는 band 기준 줄 번호 (오름차순)
+        sl = slice(y0, y1)
+        pad = self._pad[sl]
+        match_into(frame[sl], color, tol, pad[:, 1:-1], self._tmp[sl], self._diff[sl])
+        edges = np.not_equal(pad[:, 1:], pad[:, :-1], out=self._edges[sl])
+        # 2차원 nonzero 보다 1차원(flat)이 훨씬 빠름 -> 위치를 줄/칸으로 나눔
+        flat = np.flatnonzero(edges)
+        ys, xs = np.divmod(flat, edges.shape[1])
+        return y0, ys[0::2], xs[0::2], xs[1::2]
+
+    def match(self, frame, color, tol):
+        # band 별 결과의 future (위에서부터 순서대로)
+        h, w = frame.shape[:2]
+        self._buffers((h, w))
+        return [self._pool.submit(self._band, frame, color, tol, y0, y1)
+                for y0, y1 in self.bands(h)]
+
+    @staticmethod
+    def _rows(y0, rows, starts, ends, chunk=64):
+        # band 결과 -> (y, starts, ends) (빈 줄은 생략). chunk 줄씩 목록으로 바꿈
+        cuts = np.searchsorted(rows, np.arange(0, int(rows[-1]) + chunk + 1, chunk)) \
+            if len(rows) else ()
+        for a, b in zip(cuts[:-1], cuts[1:]):
+            if a == b:
+                continue
+            r = rows[a:b].tolist()
+            s = starts[a:b].tolist()
+            e = ends[a:b].tolist()
+            i = 0
+            while i < len(r):
+                j = i + 1
+                while j < len(r) and r[j] == r[i]:
+                    j += 1
+                yield y0 + r[i], s[i:j], e[i:j]
+                i = j
+
+    def blobs(self, frame, color, tol, border=0, first_only=False, min_area=0, min_size=0):
+        futures = self.match(frame, color, tol)
+
+        def runs():
+            for f in futures:
+                yield from self._rows(*f.result())
+
+        try:
+            return label_runs(runs(), frame.shape[:2], border, first_only, min_area, min_size)
+        finally:
+            # 조기 종료해도 아래쪽 band 는 이미 돌고 있으므로 끝날 때까지 대기
+            # (다음 호출이 같은 버퍼를 쓰기 때문)
+            for f in futures:
+                f.exception()
+
+    def find_top_left_blob(self, frame, color, tol, border=0, min_area=0, min_size=0):
+        blobs = self.blobs(frame, color, tol, border, True, min_area, min_size)
+        return blobs[0] if blobs else None
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
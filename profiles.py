@@ -0,0 +1,66 @@
+import json
+import os
+
+# =========================== 설정 프로필 저장/불러오기 ===========================
+# 프로필 = 이름 붙인 설정 묶음 (색상, 좌표, 간격, 허용오차, 반복, 감시 영역 위치/크기 ...)
+# 파일 하나(profiles.json)에 전부 저장하고, 마지막으로 쓴 프로필 이름도 같이 기록.
+#   {"last": "기본", "profiles": {"기본": {...}, "좌석A": {...}}}
+# 저장은 임시 파일에 쓴 뒤 교체 -> 저장 도중에 죽어도 기존 파일은 안 깨짐.
+
+DEFAULT_PATH = "profiles.json"
+
+
+class ProfileStore:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {"last": None, "profiles": {}}
+        except (OSError, ValueError) as e:
+            print(f"프로필 파일 읽기 실패: {self.path} ({e})")
+            return {"last": None, "profiles": {}}
+        if not isinstance(data, dict) or not isinstance(data.get("profiles", {}), dict):
+            print(f"프로필 파일 형식이 잘못됨: {self.path}")
+            return {"last": None, "profiles": {}}
+        data.setdefault("last", None)
+        data.setdefault("profiles", {})
+        return data
+
+    def _write(self, data):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def names(self):
+        return sorted(self._read()["profiles"])
+
+    @property
+    def last(self):
+        return self._read()["last"]
+
+    def load(self, name=None):
+        # name 이 None 이면 마지막으로 쓴 프로필. 없으면 None
+        data = self._read()
+        name = data["last"] if name is None else name
+        if name is None:
+            return None
+        return data["profiles"].get(name)
+
+    def save(self, name, profile, make_last=True):
+        data = self._read()
+        data["profiles"][name] = profile
+        if make_last:
+            data["last"] = name
+        self._write(data)
+
+    def delete(self, name):
+        data = self._read()
+        if data["profiles"].pop(name, None) is not None:
+            if data["last"] == name:
+                data["last"] = None
+            self._write(data)
@@ -0,0 +1,167 @@
+import json
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+# =========================== 감시 세션 녹화 / 재생 ===========================
+# 감시 중 캡처한 프레임을 파일 하나에 이어 붙여 저장 -> 나중에 오프라인으로
+# 허용오차/색상을 바꿔가며 다시 돌려볼 수 있다 (sweep_tolerance.py).
+#
+# 파일 구조 (.cprec)
+#   MAGIC(8) + 헤더 길이(uint32 LE) + 헤더 JSON (width, height, region, created ...)
+#   + 레코드 반복: t(float64, 녹화 시작 후 초) + n(uint32) + 픽셀 (h, w, 3) BGR uint8
+# 레코드 크기가 고정이라 np.memmap 으로 바로 열림 (읽을 때 복사 없음).
+# 용량 줄이기: 알파 채널은 버리고, 직전 프레임과 똑같은 프레임은 다시 쓰지 않고
+# 그 레코드의 n(이 화면이 이어진 캡처 횟수)만 늘린다.
+# 쓰기는 전용 스레드에서 (캡처 스레드는 큐에 넣기만, 꽉 차면 버림).
+
+MAGIC = b"CPREC01\0"
+
+
+def _record_dtype(height, width):
+    return np.dtype([("t", "<f8"), ("n", "<u4"), ("px", np.uint8, (height, width, 3))])
+
+
+class SessionWriter:
+    def __init__(self, path, region=None, maxsize=32):
+        self.path = path
+        self.region = region
+        self.written = 0
+        self.skipped = 0     # 직전 프레임과 같아서 n 만 늘림
+        self.dropped = 0     # 큐가 꽉 찼거나 크기가 달라서 버림
+        self.failed = False  # 쓰기 실패로 녹화 스레드가 끝남 (이후 push 는 버림)
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._shape = None
+        self._t0 = None
+        self._f = None
+        self._thread = threading.Thread(target=self._run, name="recording", daemon=True)
+        self._thread.start()
+
+    def push(self, frame, t):
+        # FrameRing 과 같은 모양 (파이프라인 캡처 스레드에서 호출)
+        if self.failed:
+            self.dropped += 1
+            return
+        try:
+            self._queue.put_nowait((frame, t))
+        except queue.Full:
+            self.dropped += 1
+
+    def _open(self, frame):
+        h, w = frame.shape[:2]
+        header = json.dumps({
+            "width": w, "height": h, "channels": 3, "order": "BGR",
+            "region": self.region,
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }).encode("utf-8")
+        self._f = open(self.path, "wb")
+        self._f.write(MAGIC + len(header).to_bytes(4, "little") + header)
+        self._shape = (h, w)
+
+    def _flush(self, pending):
+        t, frame, n = pending
+        self._f.write(np.float64(t - self._t0).tobytes())
+        self._f.write(np.uint32(n).tobytes())
+        self._f.write(np.ascontiguousarray(frame[..., :3]))
+        self.written += 1
+
+    def _run(self):
+        # 마지막 프레임은 같은 화면이 몇 번 더 오는지 보고 나서 쓴다
+        pending = None
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            frame, t = item
+            try:
+                if self._f is None:
+                    self._open(frame)
+                    self._t0 = t
+                if frame.shape[:2] != self._shape:
+                    # 감시 중 창 크기를 바꾸면 그 뒤 프레임은 이 파일에 못 넣음
+                    self.dropped += 1
+                    continue
+                if pending is not None and np.array_equal(frame[..., :3], pending[1][..., :3]):
+                    pending = (pending[0], pending[1], pending[2] + 1)
+                    self.skipped += 1
+                    continue
+                if pending is not None:
+                    self._flush(pending)
+                pending = (t, frame, 1)
+            except Exception as e:
+                print(f"녹화 실패: {self.path} ({e})")
+                self.failed = True
+                pending = None
+                break
+        if self._f is not None:
+            if pending is not None:
+                self._flush(pending)
+            self._f.close()
+
+    def close(self, timeout=5.0):
+        # 남은 프레임은 최대 timeout 초까지 쓰고 닫음 (Tk 스레드에서 불리므로 절대 오래 안 막힘)
+        if not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+
+class SessionFile:
+    # .cprec 읽기. frames[i] -> (h, w, 3) BGR view, times[i] -> 초, counts[i] -> 캡처 횟수
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"녹화 파일이 아님: {path}")
+            n = int.from_bytes(f.read(4), "little")
+            self.header = json.loads(f.read(n).decode("utf-8"))
+        offset = len(MAGIC) + 4 + n
+        self.width, self.height = self.header["width"], self.header["height"]
+        dtype = _record_dtype(self.height, self.width)
+        # 녹화가 중간에 끊겨서 마지막 레코드가 잘렸으면 그건 버린다
+        count = (os.path.getsize(path) - offset) // dtype.itemsize
+        if count:
+            self._records = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(count,))
+            self.frames = self._records["px"]
+            self.times = self._records["t"]
+            self.counts = self._records["n"]
+        else:
+            self._records = None
+            self.frames = np.empty((0, self.height, self.width, 3), dtype=np.uint8)
+            self.times = np.empty(0)
+            self.counts = np.empty(0, dtype=np.uint32)
+
+    def __len__(self):
+        return len(self.frames)
+
+    @property
+    def region(self):
+        return self.header.get("region") or {
+            "left": 0, "top": 0, "width": self.width, "height": self.height}
+
+
+class RecordingSource:
+    # capture.py 소스와 같은 모양. 녹화 파일을 한 장씩 BGRA 로 돌려주고 끝나면 None
+    def __init__(self, path):
+        self.file = SessionFile(path)
+        self.region = self.file.region
+        self.index = 0
+
+    def grab(self, mon=None):
+        if self.index >= len(self.file):
+            return None
+        px = self.file.frames[self.index]
+        self.index += 1
+        frame = np.empty(px.shape[:2] + (4,), dtype=np.uint8)
+        frame[..., :3] = px
+        frame[..., 3] = 255
+        return frame
+
+    def close(self):
+        pass
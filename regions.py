@@ -0,0 +1,175 @@
+from collections import namedtuple
+
+from detector import parse_color, parse_rule, rule_to_dict
+from sequence import parse_steps, step_to_dict
+
+# =========================== 여러 감시 영역 ===========================
+# Overlay 창 하나 = 감시 영역 하나였던 것을, 이름 붙인 영역 여러 개를 한 프로세스에서.
+# 영역마다 색/허용오차(또는 규칙, 템플릿)와 인식 뒤 이어서 할 단계(sequence.py)를 따로 가진다.
+#
+# tick 마다 영역 수만큼 grab 하지 않고 캡처 계획(plan_grabs)을 세운다:
+#   - 가까운 영역들은 감싸는 사각형 하나로 한 번에 캡처 (사이 빈 공간 비용 < grab 한 번 고정 비용)
+#   - 멀리 떨어진 영역, 다른 모니터에 있는 영역은 따로 캡처
+# 그 다음 각 영역은 캡처 배열의 view 로 잘라서(복사 없음) 분석한다.
+# -> 캡처 비용은 영역 개수가 아니라 실제로 덮는 면적에 비례.
+#
+#   watches = [WatchRegion("A구역", {"left": 100, "top": 200, "width": 600, "height": 400}),
+#              WatchRegion("B구역", {"left": 2020, "top": 150, "width": 500, "height": 300},
+#                          color=(0, 160, 255), steps=[Click((2400, 900), delay=0.05)])]
+#   multi = MultiCapture(CaptureSession())
+#   multi.set_regions([w.region for w in watches])
+#   for rf in multi.grab():       # RegionFrame(index, frame(view), mon) 영역 순서대로
+#       ...
+
+# region : 화면 좌표 dict {"left", "top", "width", "height"}
+# rules  : detector.ColorRule 목록 (있으면 color/tol 대신 규칙 모드)
+# template: template.TemplateMatcher (있으면 색 대신 모양)
+# steps  : 인식+첫 클릭 뒤 이어서 실행할 sequence.WaitFor / Click 목록 (비어 있으면 첫 클릭만)
+WatchRegion = namedtuple("WatchRegion", "name region color tol rules template steps",
+                         defaults=((255, 0, 0), 40, None, None, ()))
+
+# rect    : 한 번에 캡처할 사각형 (화면 좌표 dict)
+# members : 그 안에 든 영역들 ((영역 번호, rect 기준 x, y, 영역 dict), ...)
+GrabPlan = namedtuple("GrabPlan", "rect members")
+
+# 영역 하나의 프레임. frame 은 캡처 배열의 view (영역이 겹치거나 같이 캡처되면 버퍼를 같이 씀)
+RegionFrame = namedtuple("RegionFrame", "index frame mon")
+
+# grab 한 번의 고정 비용(호출/복사 준비 등)을 픽셀 수로 본 대략값.
+# 합친 사각형이 늘린 면적이 이보다 작으면 한 번에 캡처하는 쪽이 싸다.
+GRAB_OVERHEAD_PX = 256 * 256
+
+
+def _area(r):
+    return r["width"] * r["height"]
+
+
+def _union(a, b):
+    left, top = min(a["left"], b["left"]), min(a["top"], b["top"])
+    right = max(a["left"] + a["width"], b["left"] + b["width"])
+    bottom = max(a["top"] + a["height"], b["top"] + b["height"])
+    return {"left": left, "top": top, "width": right - left, "height": bottom - top}
+
+
+def monitor_index(rect, monitors):
+    # 영역 중심이 들어 있는 모니터 번호 (monitors: mss.monitors[1:] 형태). 못 찾으면 None
+    if not monitors:
+        return None
+    cx = rect["left"] + rect["width"] / 2
+    cy = rect["top"] + rect["height"] / 2
+    for k, m in enumerate(monitors):
+        if m["left"] <= cx < m["left"] + m["width"] and m["top"] <= cy < m["top"] + m["height"]:
+            return k
+    return None
+
+
+def plan_grabs(rects, monitors=None, overhead=GRAB_OVERHEAD_PX):
+    # 영역 dict 목록 -> GrabPlan 목록
+    # 묶음 비용 = 캡처 면적 + overhead. 같은 모니터의 두 묶음을 합쳐서 비용이 줄면 합치고,
+    # 더 이상 줄지 않을 때까지 가장 많이 줄어드는 쌍부터 반복 (영역은 보통 몇 개라서 전부 비교)
+    groups = [(dict(r), [k], monitor_index(r, monitors)) for k, r in enumerate(rects)]
+    while len(groups) > 1:
+        best = None
+        for i in range(len(groups)):
+            for j in range(i + 1, len(groups)):
+                a, b = groups[i], groups[j]
+                if a[2] != b[2]:
+                    continue
+                u = _union(a[0], b[0])
+                saving = _area(a[0]) + _area(b[0]) + overhead - _area(u)
+                if saving >= 0 and (best is None or saving > best[0]):
+                    best = (saving, i, j, u)
+        if best is None:
+            break
+        _, i, j, u = best
+        merged = (u, groups[i][1] + groups[j][1], groups[i][2])
+        groups = [g for k, g in enumerate(groups) if k not in (i, j)] + [merged]
+
+    plan = []
+    for rect, members, _ in sorted(groups, key=lambda g: min(g[1])):
+        plan.append(GrabPlan(rect, tuple(
+            (k, rects[k]["left"] - rect["left"], rects[k]["top"] - rect["top"], dict(rects[k]))
+            for k in sorted(members))))
+    return tuple(plan)
+
+
+class MultiCapture:
+    # CaptureSession 같은 소스를 감싸서 여러 영역을 계획대로 캡처.
+    # DetectPipeline 에 capture 로 그대로 넣을 수 있다:
+    #   .region -> 현재 계획 (GrabPlan 튜플, 영역이 바뀔 때만 통째로 교체)
+    #   .grab(plan, timings) -> RegionFrame 튜플 (영역 순서대로)
+    def __init__(self, capture, overhead=GRAB_OVERHEAD_PX):
+        self.capture = capture
+        self.overhead = overhead
+        self._plan = ()
+
+    def set_regions(self, rects, monitors=None):
+        # monitors 를 안 주면 소스에 물어봄 (CaptureSession.monitors). 계획 반환
+        if monitors is None and hasattr(self.capture, "monitors"):
+            monitors = self.capture.monitors()
+        self._plan = plan_grabs(rects, monitors, self.overhead)
+        return self._plan
+
+    @property
+    def region(self):
+        return self._plan
+
+    @property
+    def pixels(self):
+        # tick 당 캡처하는 픽셀 수
+        return sum(_area(g.rect) for g in self._plan)
+
+    def grab(self, plan=None, timings=None):
+        # timings(dict) 를 주면 capture_ms / convert_ms 는 grab 전부의 합, grabs 는 grab 횟수
+        plan = self._plan if plan is None else plan
+        out = []
+        part = {} if timings is not None else None
+        capture_ms = convert_ms = 0.0
+        for g in plan:
+            frame = self.capture.grab(g.rect) if part is None else self.capture.grab(g.rect, part)
+            if part is not None:
+                capture_ms += part.get("capture_ms", 0.0)
+                convert_ms += part.get("convert_ms", 0.0)
+            for k, x, y, mon in g.members:
+                out.append(RegionFrame(k, frame[y:y + mon["height"], x:x + mon["width"]], mon))
+        if timings is not None:
+            timings["capture_ms"] = capture_ms
+            timings["convert_ms"] = convert_ms
+            timings["grabs"] = len(plan)
+        out.sort(key=lambda rf: rf.index)
+        return tuple(out)
+
+
+# ---- 설정 파일(프로필) 저장/읽기 ----
+def region_to_dict(watch):
+    # 템플릿은 저장 안 됨 (템플릿 단계도 빠짐)
+    out = {"name": watch.name, "region": dict(watch.region),
+           "color": "#%02x%02x%02x" % tuple(watch.color), "tol": watch.tol}
+    if watch.rules:
+        out["rules"] = [rule_to_dict(r) for r in watch.rules]
+    steps = []
+    for step in watch.steps:
+        try:
+            steps.append(step_to_dict(step))
+        except ValueError:
+            pass
+    if steps:
+        out["steps"] = steps
+    return out
+
+
+def parse_regions(items):
+    # region_to_dict 의 반대. 이름이 겹치면 ValueError
+    watches = []
+    for item in items:
+        color = item.get("color", "#ff0000")
+        if isinstance(color, str):
+            color = parse_color(color)
+        rules = [parse_rule(r) for r in item["rules"]] if item.get("rules") else None
+        watches.append(WatchRegion(item["name"], dict(item["region"]), tuple(color),
+                                   item.get("tol", 40), rules,
+                                   steps=tuple(parse_steps(item.get("steps", ())))))
+    names = [w.name for w in watches]
+    if len(set(names)) != len(names):
+        raise ValueError(f"감시 영역 이름이 겹침: {names}")
+    return watches
@@ -0,0 +1,151 @@
+import math
+import threading
+import time
+from collections import deque
+
+from input_backend import wait_until
+
+# =========================== 주기 스케줄러 ===========================
+# 기존: 작업이 끝난 뒤 after(interval) -> 실제 주기 = interval + 작업 시간, 부하 걸리면 밀림.
+# 여기서는 deadline = 이전 deadline + 주기 로 고정 박자를 유지하고,
+# 작업이 길어서 deadline 을 넘기면 밀린 박자는 건너뛰고(missed) 다음 박자에 맞춘다.
+#
+# 인식(캡처)과 반복 클릭(새로고침)을 한 스레드, 한 타임라인에서 같이 돌린다.
+#  - 반복 클릭 직후 fast_for 초 동안은 fast_interval 로 빠르게 감시 (새로고침 직후가 제일 중요)
+#  - idle_after 초 동안 아무 일(새로고침/인식)이 없으면 idle_interval 로 느리게 (None 이면 끔)
+
+
+class TickStats:
+    # 실제 주기, 지터(주기 표준편차), deadline 대비 늦음, 놓친 박자 수
+    def __init__(self, window=512):
+        self.periods = deque(maxlen=window)
+        self.lateness = deque(maxlen=window)
+        self.ticks = 0
+        self.missed = 0
+        self._last = None
+
+    def record(self, t_fire, deadline, skipped=0):
+        if self._last is not None:
+            self.periods.append(t_fire - self._last)
+        self._last = t_fire
+        self.lateness.append(max(t_fire - deadline, 0.0))
+        self.ticks += 1
+        self.missed += skipped
+
+    def summary(self):
+        periods = list(self.periods)
+        late = sorted(self.lateness)
+        out = {"ticks": self.ticks, "missed": self.missed,
+               "period_ms": None, "jitter_ms": None, "late_p95_ms": None}
+        if periods:
+            mean = sum(periods) / len(periods)
+            var = sum((p - mean) ** 2 for p in periods) / len(periods)
+            out["period_ms"] = mean * 1000
+            out["jitter_ms"] = math.sqrt(var) * 1000
+        if late:
+            out["late_p95_ms"] = late[min(int(len(late) * 0.95), len(late) - 1)] * 1000
+        return out
+
+
+class DeadlineTimer:
+    def __init__(self, get_period, start=None):
+        self.get_period = get_period
+        self.deadline = time.perf_counter() if start is None else start
+        self.stats = TickStats()
+
+    def fired(self, now, period=None):
+        # 이번 박자 처리 완료 -> 다음 deadline 으로 (지난 박자는 건너뜀)
+        period = max(self.get_period() if period is None else period, 0.001)
+        deadline = self.deadline
+        nxt = deadline + period
+        skipped = 0
+        if nxt <= now:
+            skipped = int((now - deadline) // period)
+            nxt = deadline + (skipped + 1) * period
+        self.stats.record(now, deadline, skipped)
+        self.deadline = nxt
+
+
+class PollScheduler:
+    def __init__(self, get_interval, fast_interval=None, fast_for=2.0,
+                 idle_after=None, idle_interval=None):
+        self.get_interval = get_interval
+        self.fast_interval = fast_interval  # None 이면 interval / 2
+        self.fast_for = fast_for
+        self.idle_after = idle_after
+        self.idle_interval = idle_interval  # None 이면 interval * 2
+        self._lock = threading.Lock()
+        self._fast_until = 0.0
+        self._last_activity = time.perf_counter()
+        self.detect = None
+        self.repeat = None
+
+    # ---- 외부에서 호출 (Tk 스레드 등) ----
+    def start(self):
+        now = time.perf_counter()
+        with self._lock:
+            self.detect = DeadlineTimer(self.current_interval, now)
+            self._last_activity = now
+
+    def set_repeat(self, get_period):
+        # get_period: 반복 주기(초) 함수, None 이면 반복 끔. 켜면 바로 한 번 누름
+        with self._lock:
+            self.repeat = DeadlineTimer(get_period) if get_period else None
+
+    def notify_refresh(self):
+        now = time.perf_counter()
+        self._fast_until = now + self.fast_for
+        self._last_activity = now
+        # 빠른 감시로 바뀌었으면 다음 캡처를 앞당김
+        with self._lock:
+            if self.detect is not None:
+                self.detect.deadline = min(self.detect.deadline, now + self.current_interval(now))
+
+    def notify_activity(self):
+        self._last_activity = time.perf_counter()
+
+    def current_interval(self, now=None):
+        now = time.perf_counter() if now is None else now
+        base = self.get_interval()
+        if now < self._fast_until:
+            return self.fast_interval if self.fast_interval is not None else base / 2
+        if self.idle_after is not None and now - self._last_activity > self.idle_after:
+            return self.idle_interval if self.idle_interval is not None else base * 2
+        return base
+
+    @property
+    def mode(self):
+        now = time.perf_counter()
+        if now < self._fast_until:
+            return "fast"
+        if self.idle_after is not None and now - self._last_activity > self.idle_after:
+            return "idle"
+        return "normal"
+
+    # ---- 스케줄러 스레드 ----
+    def next(self, stop):
+        # 다음에 할 일 "detect" / "repeat" 을 제 시각까지 기다렸다가 반환. stop 되면 None
+        while True:
+            with self._lock:
+                timers = [(t.deadline, name, t)
+                          for name, t in (("repeat", self.repeat), ("detect", self.detect))
+                          if t is not None]
+            if not timers:
+                return None
+            deadline, name, timer = min(timers, key=lambda x: x[0])
+            if not wait_until(deadline, stop):
+                return None
+            with self._lock:
+                # 기다리는 사이 반복이 꺼졌거나 바뀌었으면 다시 고른다
+                if getattr(self, name) is not timer:
+                    continue
+                timer.fired(time.perf_counter())
+            return name
+
+    def stats(self):
+        out = {"mode": self.mode, "interval_ms": self.current_interval() * 1000}
+        with self._lock:
+            for name in ("detect", "repeat"):
+                timer = getattr(self, name)
+                out[name] = timer.stats.summary() if timer is not None else None
+        return out
@@ -0,0 +1,178 @@
+import time
+from collections import namedtuple
+
+from detector import parse_color
+from engine import DetectionEngine
+from input_backend import wait_until
+
+# =========================== 단계 순서 (좌석 -> 확인 -> 결제 ...) ===========================
+# 인식 한 번 + 고정 두 번째 클릭 대신, 여러 단계를 선언해 두고 한 스레드에서 끝까지 돌린다.
+# Tk after() 로 돌아가지 않으므로 단계 사이 지연 = 캡처 + 분석 시간뿐.
+#
+#   WaitFor : 목표(색상 또는 템플릿)가 region 에 나타날 때까지 캡처/분석 반복,
+#             나타나면 (click=True 면) 그 중앙 + offset 을 클릭. timeout 초 지나면 실패
+#   Click   : 직전 단계 후 delay 초 기다렸다가 고정 좌표 클릭
+#
+#   steps = [
+#       WaitFor(color=(0, 200, 80), tol=30, timeout=2.0, name="확인 버튼"),
+#       Click((1200, 900), delay=0.05, name="결제"),
+#   ]
+#   report = SequenceRunner(capture, backend).run(steps, region=mon)
+#
+# 설정 파일 등에서 읽을 때는 parse_steps([{"wait": "#00c850", "tol": 30}, {"click": [1200, 900]}])
+
+# region  : 캡처 영역 dict (None 이면 run 에 준 기본 영역)
+# template: template.TemplateMatcher (있으면 color 대신)
+WaitFor = namedtuple("WaitFor", "color tol template region timeout click offset interval name",
+                     defaults=(None, 40, None, None, 5.0, True, (0, 0), 0.0, None))
+Click = namedtuple("Click", "pos delay name", defaults=(0.0, None))
+
+
+# 파일에서 받는 키 (나머지 키는 오타로 보고 ValueError)
+_WAIT_KEYS = {"tol", "region", "timeout", "click", "interval"}
+_CLICK_KEYS = {"delay"}
+
+
+def parse_steps(items):
+    # [{"wait": "#rrggbb", "tol": 30, "timeout": 2, "region": {...}, "click": false}, ...]
+    # [{"click": [x, y], "delay": 0.1}, ...]
+    steps = []
+    for item in items:
+        item = dict(item)
+        name = item.pop("name", None)
+        if "wait" in item:
+            color = item.pop("wait")
+            if isinstance(color, str):
+                color = parse_color(color)
+            offset = tuple(item.pop("offset", (0, 0)))
+            _check_keys(item, _WAIT_KEYS)
+            steps.append(WaitFor(tuple(color), name=name, offset=offset, **item))
+        elif "click" in item:
+            pos = tuple(item.pop("click"))
+            _check_keys(item, _CLICK_KEYS)
+            steps.append(Click(pos, name=name, **item))
+        else:
+            raise ValueError(f"알 수 없는 단계: {item}")
+    return steps
+
+
+def _check_keys(item, allowed):
+    unknown = set(item) - allowed
+    if unknown:
+        raise ValueError(f"알 수 없는 단계 키: {sorted(unknown)}")
+
+
+def step_to_dict(step):
+    # parse_steps 의 반대 (템플릿 단계는 저장 안 됨)
+    if isinstance(step, Click):
+        out = {"click": list(step.pos), "delay": step.delay}
+    else:
+        if step.template is not None:
+            raise ValueError("템플릿 단계는 파일로 저장할 수 없음")
+        out = {"wait": "#%02x%02x%02x" % tuple(step.color), "tol": step.tol,
+               "timeout": step.timeout, "click": step.click, "offset": list(step.offset),
+               "interval": step.interval, "region": step.region}
+    if step.name is not None:
+        out["name"] = step.name
+    return out
+
+
+class SequenceRunner:
+    def __init__(self, capture, backend, border=0):
+        self.capture = capture   # CaptureSession (스레드별 mss 라서 어느 스레드에서 돌려도 됨)
+        self.backend = backend   # input_backend.InputBackend
+        # 기본 영역(run 의 region / capture.region)을 볼 때 가장자리에서 안 볼 폭 (Overlay 테두리).
+        # 단계에 따로 준 region 은 테두리와 무관하므로 전부 봄
+        self.border = border
+        # 파이프라인 엔진과 버퍼/캐시를 같이 쓰지 않도록 전용 엔진
+        self.engine = DetectionEngine()
+
+    def run(self, steps, region=None, stop=None, t_start=None):
+        # 단계를 순서대로 실행. 단계별 기록 목록 반환 (실패/중지된 단계에서 끝남)
+        # 기록: name, kind, ok, wait_ms(단계 시작 -> 인식/대기 끝), frames(분석한 프레임 수),
+        #       detect_ms(분석 시간 합), click_ms(인식 -> 클릭), pos, t(시작 기준 클릭 시각 ms)
+        t_start = time.perf_counter() if t_start is None else t_start
+        report = []
+        t_prev = t_start
+        for k, step in enumerate(steps):
+            name = step.name or f"{k + 1}"
+            if isinstance(step, Click):
+                rec = self._click(step, t_prev, stop)
+            else:
+                rec = self._wait_for(step, region, stop)
+            rec["name"] = name
+            if rec.get("t_click") is not None:
+                t_prev = rec["t_click"]
+                rec["t"] = (rec.pop("t_click") - t_start) * 1000
+            else:
+                rec.pop("t_click", None)
+            report.append(rec)
+            if not rec["ok"]:
+                break
+        return report
+
+    def _click(self, step, t_prev, stop):
+        rec = {"kind": "click", "ok": False, "pos": step.pos, "t_click": None}
+        t0 = time.perf_counter()
+        if step.delay > 0 and not wait_until(t_prev + step.delay, stop):
+            return rec
+        rec["t_click"] = self.backend.click(*step.pos)
+        rec["wait_ms"] = (rec["t_click"] - t0) * 1000
+        rec["ok"] = True
+        return rec
+
+    def _wait_for(self, step, region, stop):
+        rec = {"kind": "wait", "ok": False, "frames": 0, "detect_ms": 0.0, "pos": None,
+               "t_click": None}
+        mon = step.region or region or self.capture.region
+        self.engine.border = 0 if step.region else self.border
+        t0 = time.perf_counter()
+        deadline = t0 + step.timeout
+        while stop is None or not stop.is_set():
+            t_grab = time.perf_counter()
+            frame = self.capture.grab(mon)
+            t_a = time.perf_counter()
+            if step.template is not None:
+                hit = self.engine.detect(frame, mon, template=step.template)
+            else:
+                hit = self.engine.detect(frame, mon, step.color, step.tol)
+            t_found = time.perf_counter()
+            rec["frames"] += 1
+            rec["detect_ms"] += (t_found - t_a) * 1000
+            if hit is not None:
+                rec["wait_ms"] = (t_found - t0) * 1000
+                rec["pos"] = (hit.pos[0] + step.offset[0], hit.pos[1] + step.offset[1])
+                if step.click:
+                    rec["t_click"] = self.backend.click(*rec["pos"])
+                    rec["click_ms"] = (rec["t_click"] - t_found) * 1000
+                else:
+                    rec["t_click"] = t_found
+                rec["ok"] = True
+                return rec
+            if t_found >= deadline:
+                rec["wait_ms"] = (t_found - t0) * 1000
+                rec["timeout"] = True
+                return rec
+            if step.interval > 0 and not wait_until(t_grab + step.interval, stop):
+                break
+        return rec
+
+
+def format_report(report):
+    # 콘솔 출력용 한 단계 한 줄
+    lines = []
+    for rec in report:
+        state = "OK" if rec["ok"] else ("시간초과" if rec.get("timeout") else "중지")
+        line = f"  [{rec['name']}] {rec['kind']:5} {state:4}"
+        if rec.get("wait_ms") is not None:
+            line += f"  대기 {rec['wait_ms']:8.1f}ms"
+        if rec["kind"] == "wait":
+            line += f"  프레임 {rec['frames']:4d}  분석 {rec['detect_ms']:7.1f}ms"
+            if rec.get("click_ms") is not None:
+                line += f"  인식→클릭 {rec['click_ms']:.2f}ms"
+        if rec.get("t") is not None:
+            line += f"  @{rec['t']:.1f}ms"
+        if rec.get("pos") is not None:
+            line += f"  {tuple(rec['pos'])}"
+        lines.append(line)
+    return "\n".join(lines)
@@ -0,0 +1,130 @@
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from detector import parse_color
+from engine import DetectionEngine
+from recording import SessionFile
+
+# =========================== 녹화 세션으로 허용오차/색상 고르기 ===========================
+# auto_clicker 에서 record_sessions = True 로 감시하면 세션_*.cprec 가 남는다.
+# 그 파일을 색상 x 허용오차 조합마다 다시 돌려서
+#   hits      : 인식된 캡처 수 (같은 화면이 이어진 횟수까지 셈)
+#   first     : 처음 인식된 프레임 번호 (실제 감시였다면 여기서 클릭)
+#   fp / miss : --truth 를 주면 정답 대비 오인식 / 놓친 캡처 수
+#   ms/frame  : 프레임당 분석 시간 (중앙값)
+# 을 보여준다. 조합마다 별도 프로세스, 녹화 파일은 각 프로세스가 memmap 으로 직접 연다.
+#
+#   python sweep_tolerance.py 세션_20250101_120000.cprec --tols 20 40 60 80 100
+#   python sweep_tolerance.py rec.cprec --colors ff0000 e03c3c --truth "120-180, 300" --out sweep.json
+#
+# --truth : 목표 색이 실제로 보였던 프레임 번호 ("a-b" 범위, 쉼표 구분) 또는 그런 json 목록 파일
+
+
+def parse_frames(text):
+    if os.path.exists(text):
+        with open(text, encoding="utf-8") as f:
+            items = json.load(f)
+    else:
+        items = [s for s in text.replace(" ", "").split(",") if s]
+    frames = set()
+    for item in items:
+        if isinstance(item, str) and "-" in item:
+            a, b = item.split("-")
+            frames.update(range(int(a), int(b) + 1))
+        else:
+            frames.add(int(item))
+    return frames
+
+
+def replay(path, color, tol, border, min_size):
+    # 워커 프로세스: 녹화 전체를 한 조합으로 돌림 -> 인식된 프레임 번호, 프레임별 시간
+    rec = SessionFile(path)
+    engine = DetectionEngine(color=color, tol=tol, border=border, min_size=min_size)
+    hits, cost = [], []
+    for i in range(len(rec)):
+        frame = rec.frames[i]
+        t0 = time.perf_counter()
+        hit = engine.detect(frame)
+        cost.append(time.perf_counter() - t0)
+        if hit is not None:
+            hits.append(i)
+    return {"color": "#%02x%02x%02x" % color, "tol": tol, "hits": hits,
+            "ms_per_frame": float(np.median(cost)) * 1000 if cost else None}
+
+
+def score(result, times, counts, truth):
+    hits = result["hits"]
+    hit_set = set(hits)
+
+    def ticks(frames):
+        return int(sum(int(counts[i]) for i in frames))
+
+    out = {
+        "color": result["color"], "tol": result["tol"],
+        "hits": ticks(hit_set),
+        "first": hits[0] if hits else None,
+        "first_t": float(times[hits[0]]) if hits else None,
+        "ms_per_frame": result["ms_per_frame"],
+    }
+    if truth is not None:
+        out["fp"] = ticks(hit_set - truth)
+        out["miss"] = ticks(truth - hit_set)
+        # 클릭은 첫 인식에서 일어나므로 그게 정답 프레임인지가 제일 중요
+        out["first_ok"] = bool(hits) and hits[0] in truth
+    return out
+
+
+def print_row(r):
+    first = "-" if r["first"] is None else f"{r['first']} ({r['first_t']:.2f}s)"
+    line = f"{r['color']} tol={r['tol']:<3}  hits {r['hits']:5d}  first {first:>16}"
+    if "fp" in r:
+        ok = "O" if r["first_ok"] else "X"
+        line += f"  fp {r['fp']:5d}  miss {r['miss']:5d}  첫클릭 {ok}"
+    if r["ms_per_frame"] is not None:
+        line += f"  {r['ms_per_frame']:6.2f} ms/frame"
+    print(line)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("recording", help=".cprec 녹화 파일")
+    ap.add_argument("--colors", nargs="+", default=["ff0000"], help="RRGGBB")
+    ap.add_argument("--tols", nargs="+", type=int, default=[20, 40, 60, 80, 100])
+    ap.add_argument("--border", type=int, default=4)
+    ap.add_argument("--min-size", type=int, default=0)
+    ap.add_argument("--truth", help="정답 프레임 번호 (\"10-20,35\" 또는 json 파일)")
+    ap.add_argument("--jobs", type=int, default=None, help="워커 프로세스 수 (기본: CPU 수)")
+    ap.add_argument("--out", help="결과 json")
+    args = ap.parse_args()
+
+    rec = SessionFile(args.recording)
+    truth = parse_frames(args.truth) if args.truth else None
+    if truth is not None:
+        truth &= set(range(len(rec)))
+    print(f"{args.recording}: {len(rec)} 프레임 (캡처 {int(rec.counts.sum())}번), "
+          f"{rec.width}x{rec.height}")
+
+    combos = list(itertools.product([parse_color(c) for c in args.colors], args.tols))
+    with ProcessPoolExecutor(args.jobs) as pool:
+        futures = [pool.submit(replay, args.recording, color, tol, args.border, args.min_size)
+                   for color, tol in combos]
+        results = [score(f.result(), rec.times, rec.counts, truth) for f in futures]
+    for r in results:
+        print_row(r)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"recording": args.recording, "frames": len(rec),
+                       "truth": sorted(truth) if truth is not None else None,
+                       "results": results}, f, indent=1, ensure_ascii=False)
+        print(f"저장: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import csv
+import json
+import threading
+import time
+from collections import deque
+
+# =========================== tick 단위 계측 ===========================
+# 감시 한 번(tick)마다 단계별 시간(ms)을 dict 하나에 모은다.
+#   capture  : mss grab (OS 캡처)
+#   convert  : grab 버퍼 -> 배열
+#   match    : 허용오차 마스크 (규칙 모드면 LUT 매칭)
+#   label    : blob 묶기 + 가장 위/왼쪽 고르기
+#   detect   : 분석 전체 (match + label + 나머지)
+#   click    : 클릭 순서 전체 (첫 클릭 ~ 마지막 클릭)
+#   detect_to_click / grab_to_click : 인식 완료/캡처 시작 -> 첫 클릭
+# 최근 window 개만 들고 있으면서 단계별 p50/p95/max 와 fps 를 낸다.
+# path 를 주면 tick 마다 한 줄씩 기록 (.csv 면 CSV, 그 외는 JSON lines).
+# dup=True 인 tick 은 직전과 같은 화면이라 분석을 건너뛴 것 (연속 감시 모드).
+
+STAGES = ("capture", "convert", "match", "label", "detect",
+          "click", "detect_to_click", "grab_to_click")
+
+
+def percentile(values, q):
+    # 정렬된 목록에서 q(0~1) 위치 값 (가장 가까운 순위)
+    if not values:
+        return None
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+class JsonLinesSink:
+    def __init__(self, path):
+        self._f = open(path, "a", encoding="utf-8")
+
+    def write(self, tick):
+        self._f.write(json.dumps(tick, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self._f.close()
+
+
+class CsvSink:
+    FIELDS = ("t", "hit", "dup") + tuple(f"{s}_ms" for s in STAGES)
+
+    def __init__(self, path):
+        self._f = open(path, "a", encoding="utf-8", newline="")
+        self._w = csv.DictWriter(self._f, self.FIELDS, extrasaction="ignore")
+        if self._f.tell() == 0:
+            self._w.writeheader()
+
+    def write(self, tick):
+        self._w.writerow(tick)
+
+    def close(self):
+        self._f.close()
+
+
+def open_sink(path):
+    if path is None:
+        return None
+    if str(path).lower().endswith(".csv"):
+        return CsvSink(path)
+    return JsonLinesSink(path)
+
+
+class TickRecorder:
+    def __init__(self, window=600, path=None):
+        self.ticks = 0
+        self.hits = 0
+        self._stages = {s: deque(maxlen=window) for s in STAGES}
+        self._times = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._sink = open_sink(path)
+
+    def record(self, tick):
+        # tick: {"t": time.time(), "hit": bool, "<stage>_ms": float, ...}
+        with self._lock:
+            self.ticks += 1
+            self.hits += bool(tick.get("hit"))
+            self._times.append(time.perf_counter())
+            for s, values in self._stages.items():
+                v = tick.get(f"{s}_ms")
+                if v is not None:
+                    values.append(v)
+            if self._sink is not None:
+                self._sink.write(tick)
+
+    def fps(self):
+        # 최근 window 개 tick 기준 초당 처리 수
+        with self._lock:
+            times = list(self._times)
+        if len(times) < 2 or times[-1] <= times[0]:
+            return None
+        return (len(times) - 1) / (times[-1] - times[0])
+
+    def summary(self):
+        with self._lock:
+            stages = {s: sorted(v) for s, v in self._stages.items()}
+            out = {"ticks": self.ticks, "hits": self.hits}
+        out["fps"] = self.fps()
+        for s, values in stages.items():
+            if values:
+                out[s] = {"p50": percentile(values, 0.5), "p95": percentile(values, 0.95),
+                          "max": values[-1], "n": len(values)}
+        return out
+
+    def close(self):
+        with self._lock:
+            if self._sink is not None:
+                self._sink.close()
+                self._sink = None
@@ -0,0 +1,235 @@
+import numpy as np
+
+from detector import ColorMatcher, B, G, R
+
+# =========================== 템플릿(패치) 매칭 ===========================
+# 색 하나로는 헷갈릴 때 (배너의 빨강 vs 좌석의 빨강) 작은 기준 이미지(패치)와 모양까지 비교.
+# 점수 = 정규화 상호상관 (ZNCC, -1~1, 밝기/대비가 달라도 모양이 같으면 1 에 가까움)
+#   분자   : 패치(평균 뺀 것)와 화면의 상관 -> FFT 로 한 번에 (rfft2 곱 -> irfft2)
+#   분모   : 창마다 화면 분산 -> 적분 영상(누적합)으로 창 크기와 무관하게 O(1)
+# 속도:
+#   1) 색 사전 필터(prefilter): 패치의 대표 색과 맞는 픽셀이 없으면 FFT 없이 바로 None,
+#      있으면 그 픽셀들을 덮는 영역(+패치 크기)만 잘라서 본다 -> 대부분의 tick 은 마스크 한 번.
+#   2) 축소 탐색: 패치가 충분히 크면 1/2, 1/4 로 줄인 영상에서 먼저 후보를 찾고
+#      후보 주변만 원래 해상도로 다시 계산 (detector.coarse_find_top_left_blob 과 같은 생각).
+#      화면을 s x s 로 묶는 칸 경계와 패치 위치가 어긋나면(위상) 줄인 패치와 모양이 달라져서
+#      점수가 떨어진다 -> 패치를 s*s 가지 위상으로 각각 줄여 두고 전부 비교한다
+#      (화면 쪽 FFT/분산은 한 번만 계산하고 위상별로는 곱 + 역변환만).
+
+# 밝기 = (29 B + 150 G + 77 R) / 256  (정수 연산)
+# uint8 * 스칼라는 numpy 1.x 에서 uint8 로 남아 넘친다 -> 첫 채널을 uint16 으로 올려서 시작
+_GRAY_W = (29, 150, 77)
+
+
+def to_gray(frame):
+    # (h, w, 3|4) BGR(A) uint8 -> (h, w) float32
+    g = frame[..., B].astype(np.uint16)
+    g *= _GRAY_W[0]
+    g += frame[..., G].astype(np.uint16) * _GRAY_W[1]
+    g += frame[..., R].astype(np.uint16) * _GRAY_W[2]
+    g >>= 8
+    return g.astype(np.float32)
+
+
+def downsample(g, s):
+    # s x s 블록 평균 (끝에 남는 줄/칸은 버림)
+    if s == 1:
+        return g
+    h, w = g.shape[0] // s, g.shape[1] // s
+    out = np.zeros((h, w), dtype=np.float32)
+    for i in range(s):
+        for j in range(s):
+            out += g[i:h * s:s, j:w * s:s]
+    out *= 1.0 / (s * s)
+    return out
+
+
+def _fast_len(n):
+    # n 이상인 2^a 3^b 5^c 중 가장 작은 값 (FFT 가 빠른 크기)
+    best = 1 << max(int(n - 1).bit_length(), 0)
+    f5 = 1
+    while f5 < best:
+        f35 = f5
+        while f35 < best:
+            f = f35
+            while f < n:
+                f *= 2
+            best = min(best, f)
+            f35 *= 3
+        f5 *= 5
+    return best
+
+
+def _prepare(g, h, w):
+    # (h, w) 패치들과 비교할 화면 쪽 준비물: FFT 크기, 화면 스펙트럼, 창별 분산
+    H, W = g.shape
+    shape = (_fast_len(H), _fast_len(W))
+    s1 = _window_sums(g, h, w)
+    s2 = _window_sums(np.square(g, dtype=np.float64), h, w)
+    var = np.maximum(s2 - s1 * s1 / (h * w), 0.0)
+    return shape, np.fft.rfft2(g, shape), var
+
+
+def _window_sums(img, h, w):
+    # 모든 (h, w) 창의 합 (결과 크기: H-h+1, W-w+1)
+    s = np.zeros((img.shape[0] + 1, img.shape[1] + 1), dtype=np.float64)
+    np.cumsum(img, axis=0, out=s[1:, 1:])
+    np.cumsum(s[1:, 1:], axis=1, out=s[1:, 1:])
+    return s[h:, w:] - s[:-h, w:] - s[h:, :-w] + s[:-h, :-w]
+
+
+class _Level:
+    # 한 배율에서의 패치 (평균 뺀 밝기, 크기, 노름, FFT 크기별 스펙트럼 캐시)
+    def __init__(self, gray):
+        t = gray - gray.mean()
+        self.t = t.astype(np.float32)
+        self.height, self.width = t.shape
+        self.norm = float(np.sqrt((t.astype(np.float64) ** 2).sum()))
+        self._spectra = {}
+
+    def spectrum(self, shape):
+        spec = self._spectra.get(shape)
+        if spec is None:
+            if len(self._spectra) >= 8:
+                self._spectra.clear()
+            # 상관 = 뒤집은 패치와의 합성곱 -> conj 로 처리
+            spec = self._spectra[shape] = np.conj(np.fft.rfft2(self.t, shape))
+        return spec
+
+    def scores(self, g, prep=None):
+        # 패치 왼쪽 위 좌표별 ZNCC 점수 (H-h+1, W-w+1)
+        # prep: 같은 크기 패치끼리 화면 쪽 계산을 나눠 쓰려면 _prepare(g, h, w) 결과
+        h, w = self.height, self.width
+        H, W = g.shape
+        shape, spec, var = prep or _prepare(g, h, w)
+        num = np.fft.irfft2(spec * self.spectrum(shape), shape)
+        num = num[:H - h + 1, :W - w + 1]
+        den = np.sqrt(var) * self.norm
+        # 거의 단색인 창(패치 표준편차의 5% 미만)은 점수 0 (오차로 점수가 튀는 것 방지)
+        out = np.zeros(num.shape, dtype=np.float64)
+        np.divide(num, den, out=out, where=var > 0.0025 * self.norm ** 2)
+        return np.clip(out, -1.0, 1.0, out=out)
+
+
+class TemplateMatcher:
+    def __init__(self, patch, threshold=0.8, prefilter=None, prefilter_tol=40, scale=None,
+                 candidates=5):
+        # patch     : (h, w, 3|4) BGR(A) uint8 (화면 캡처 그대로)
+        # threshold : 이 점수 이상일 때만 인식
+        # prefilter : 사전 필터 색 (r, g, b). "center" 면 패치 가운데 픽셀 색, None 이면 끔
+        # scale     : 축소 탐색 배율 (1/2/4). None 이면 패치 크기 보고 자동 (줄인 패치가 12px 이상)
+        patch = np.ascontiguousarray(patch[..., :3])
+        self.patch = patch
+        self.height, self.width = patch.shape[:2]
+        self.threshold = threshold
+        if isinstance(prefilter, str) and prefilter == "center":
+            px = patch[self.height // 2, self.width // 2]
+            prefilter = (int(px[R]), int(px[G]), int(px[B]))
+        self.prefilter = prefilter
+        self.prefilter_tol = prefilter_tol
+        self.candidates = candidates
+
+        gray = to_gray(patch)
+        self._full = _Level(gray)
+        if self._full.norm < 1e-3:
+            raise ValueError("패치가 단색이라 모양 비교가 안 됨 (색상 모드를 쓸 것)")
+        if scale is None:
+            scale = 1
+            while scale < 4 and min(self.height, self.width) // (scale * 2) >= 12:
+                scale *= 2
+        self.scale = scale
+        # 위상 (py, px) 마다 gray[py:, px:] 를 줄인 패치 (크기는 모두 같게 자름)
+        self._coarse = None
+        if scale > 1:
+            ch, cw = (self.height - scale + 1) // scale, (self.width - scale + 1) // scale
+            self._coarse = [(py, px, _Level(downsample(gray[py:, px:], scale)[:ch, :cw]))
+                            for py in range(scale) for px in range(scale)]
+            if min(lv.norm for _, _, lv in self._coarse) < 1e-3:
+                self.scale, self._coarse = 1, None
+        self._matcher = ColorMatcher()
+        self.last_score = None
+
+    def _search_box(self, frame):
+        # 사전 필터: 검색할 (y0, y1, x0, x1), 후보가 없으면 None
+        H, W = frame.shape[:2]
+        if self.prefilter is None:
+            return 0, H, 0, W
+        mask = self._matcher.match(frame, self.prefilter, self.prefilter_tol)
+        rows = np.flatnonzero(mask.any(axis=1))
+        if not len(rows):
+            return None
+        cols = np.flatnonzero(mask[rows[0]:rows[-1] + 1].any(axis=0))
+        h, w = self.height, self.width
+        y0, y1 = max(int(rows[0]) - h + 1, 0), min(int(rows[-1]) + h, H)
+        x0, x1 = max(int(cols[0]) - w + 1, 0), min(int(cols[-1]) + w, W)
+        return y0, y1, x0, x1
+
+    def scores(self, frame):
+        # 원래 해상도 전체 점수 (사전 필터/축소 없이, 확인용)
+        return self._full.scores(to_gray(frame))
+
+    def _coarse_peaks(self, g):
+        # 줄인 영상에서 점수 높은 위치 몇 개 (원래 해상도 좌표). 한 봉우리 주변은 한 번만
+        s = self.scale
+        gd = downsample(g, s)
+        ch, cw = self._coarse[0][2].height, self._coarse[0][2].width
+        prep = _prepare(gd, ch, cw)
+        # 위치별로 위상 중 가장 높은 점수 (어느 위상인지는 봉우리에서만 다시 확인)
+        maps = [lv.scores(gd, prep) for _, _, lv in self._coarse]
+        sc = maps[0].copy()
+        for cur in maps[1:]:
+            np.maximum(sc, cur, out=sc)
+        floor = self.threshold - 0.25  # 줄이면 점수가 조금 떨어지므로 여유
+        peaks = []
+        for _ in range(self.candidates):
+            k = int(np.argmax(sc))
+            y, x = divmod(k, sc.shape[1])
+            if sc[y, x] < floor:
+                break
+            py, px, _ = self._coarse[int(np.argmax([m[y, x] for m in maps]))]
+            peaks.append((max(y * s - py, 0), max(x * s - px, 0)))
+            sc[max(y - ch // 2, 0):y + ch // 2 + 1, max(x - cw // 2, 0):x + cw // 2 + 1] = -1.0
+        return peaks
+
+    def _best(self, g):
+        # g 안에서 가장 점수 높은 (x, y, score)
+        sc = self._full.scores(g)
+        k = int(np.argmax(sc))
+        y, x = divmod(k, sc.shape[1])
+        return x, y, float(sc[y, x])
+
+    def find(self, frame):
+        # 가장 잘 맞는 위치 (x, y, score) (프레임 기준 패치 왼쪽 위). threshold 미만이면 None
+        self.last_score = None
+        box = self._search_box(frame)
+        if box is None:
+            return None
+        y0, y1, x0, x1 = box
+        h, w = self.height, self.width
+        if y1 - y0 < h or x1 - x0 < w:
+            return None
+        g = to_gray(frame[y0:y1, x0:x1])
+
+        s = self.scale
+        if self._coarse is None or (y1 - y0) // s < self._coarse[0][2].height * 2 \
+                or (x1 - x0) // s < self._coarse[0][2].width * 2:
+            best = self._best(g)
+        else:
+            # 후보 주변 (+-2s) 만 원래 해상도로
+            best = None
+            for py, px in self._coarse_peaks(g):
+                ry0, rx0 = max(py - 2 * s, 0), max(px - 2 * s, 0)
+                sub = g[ry0:py + h + 2 * s, rx0:px + w + 2 * s]
+                if sub.shape[0] < h or sub.shape[1] < w:
+                    continue
+                x, y, score = self._best(sub)
+                if best is None or score > best[2]:
+                    best = (rx0 + x, ry0 + y, score)
+            if best is None:
+                return None
+
+        x, y, score = best
+        self.last_score = score
+        if score < self.threshold:
+            return None
+        return x0 + x, y0 + y, score
@@ -0,0 +1,137 @@
+from collections import deque
+
+import numpy as np
+import pytest
+
+from detector import match_mask, find_top_left_blob, coarse_find_top_left_blob
+from engine import DetectionEngine
+
+# 인식 경로(run/union-find, incremental, band 병렬, 성긴 탐색)를 예전 BFS 방식 결과와 비교
+# 예전 방식: border 안쪽 픽셀에서 시작하는 4-연결 BFS (퍼질 때는 border 까지 포함),
+#           blob 마다 가장 위 줄의 가장 왼쪽 픽셀이 top-left, 그중 가장 위/왼쪽 blob 선택
+
+TARGET = (255, 0, 0)
+TOL = 40
+
+
+def legacy_top_left(mask, border=0, min_area=0, min_size=0):
+    # (top_left, bbox, area) 또는 None
+    h, w = mask.shape
+    seen = np.zeros_like(mask)
+    best = None
+    for y in range(border, h - border):
+        for x in np.flatnonzero(mask[y, border:w - border] & ~seen[y, border:w - border]):
+            x = int(x) + border
+            if seen[y, x]:
+                continue
+            seen[y, x] = True
+            q = deque([(x, y)])
+            pts = []
+            while q:
+                px, py = q.popleft()
+                pts.append((px, py))
+                for nx, ny in ((px - 1, py), (px + 1, py), (px, py - 1), (px, py + 1)):
+                    if 0 <= nx < w and 0 <= ny < h and mask[ny, nx] and not seen[ny, nx]:
+                        seen[ny, nx] = True
+                        q.append((nx, ny))
+            xs = [p[0] for p in pts]
+            ys = [p[1] for p in pts]
+            top = min(ys)
+            left = min(p[0] for p in pts if p[1] == top)
+            bbox = (min(xs), top, max(xs), max(ys))
+            if (len(pts) < min_area or bbox[2] - bbox[0] + 1 < min_size
+                    or bbox[3] - bbox[1] + 1 < min_size):
+                continue
+            if best is None or (top, left) < (best[0][1], best[0][0]):
+                best = ((left, top), bbox, len(pts))
+    return best
+
+
+def as_tuple(blob):
+    return None if blob is None else (blob.top_left, blob.bbox, blob.area)
+
+
+def random_frame(rng, h=120, w=200, shapes=8, noise=0.01):
+    # 사각형, L/U 모양(아래에서 합쳐지는 blob), 노이즈 점, 가장자리에 걸친 blob
+    frame = np.empty((h, w, 4), dtype=np.uint8)
+    frame[..., :3] = rng.integers(60, 180, (h, w, 3))
+    frame[..., 3] = 255
+    red = (0, 0, 255)
+    for _ in range(shapes):
+        y, x = int(rng.integers(-5, h - 4)), int(rng.integers(-5, w - 4))
+        bh, bw = int(rng.integers(1, 24)), int(rng.integers(1, 24))
+        ys, xs = slice(max(y, 0), y + bh), slice(max(x, 0), x + bw)
+        kind = rng.integers(3)
+        if kind == 0:
+            frame[ys, xs, :3] = red
+        else:
+            # U 모양: 두 기둥이 아래 줄에서 이어짐 (위쪽에서는 따로 보임)
+            frame[ys, max(x, 0):x + 2, :3] = red
+            frame[ys, max(x + bw - 2, 0):x + bw, :3] = red
+            frame[max(y + bh - 2, 0):y + bh, xs, :3] = red
+            if kind == 2:
+                frame[ys, xs][::2, ::3, :3] = red
+    n = int(h * w * noise)
+    frame[rng.integers(0, h, n), rng.integers(0, w, n), :3] = red
+    return frame
+
+
+@pytest.mark.parametrize("border,min_area,min_size", [(0, 0, 0), (4, 0, 0), (4, 6, 2), (0, 0, 5)])
+def test_find_top_left_blob_matches_bfs(border, min_area, min_size):
+    rng = np.random.default_rng(border * 100 + min_area * 10 + min_size)
+    for _ in range(30):
+        mask = match_mask(random_frame(rng), TARGET, TOL)
+        assert as_tuple(find_top_left_blob(mask, border, min_area, min_size)) == \
+            legacy_top_left(mask, border, min_area, min_size)
+
+
+def _engine_blob(engine, frame, **kw):
+    hit = engine.detect(frame, {"left": 0, "top": 0}, TARGET, TOL, **kw)
+    return None if hit is None else as_tuple(hit.blob)
+
+
+@pytest.mark.parametrize("make_engine", [
+    lambda: DetectionEngine(border=3, incremental=True, tile=32),
+    lambda: DetectionEngine(border=3, workers=3),
+], ids=["incremental", "parallel"])
+def test_engine_paths_match_bfs(make_engine):
+    # 같은 엔진으로 조금씩 바뀌는 프레임을 이어서 넣음 (incremental 캐시/타일 갱신 경로까지)
+    rng = np.random.default_rng(7)
+    engine = make_engine()
+    try:
+        frame = random_frame(rng)
+        for k in range(40):
+            frame = frame.copy()
+            if k % 5 == 4:
+                frame = random_frame(rng)
+            else:
+                # 일부 타일만 바꿈 (blob 추가/지우기)
+                y, x = int(rng.integers(0, 110)), int(rng.integers(0, 190))
+                color = (0, 0, 255) if rng.random() < 0.5 else (100, 100, 100)
+                frame[y:y + int(rng.integers(1, 10)), x:x + int(rng.integers(1, 10)), :3] = color
+            mask = match_mask(frame, TARGET, TOL)
+            assert _engine_blob(engine, frame) == legacy_top_left(mask, 3), k
+    finally:
+        engine.close()
+
+
+@pytest.mark.parametrize("stride", [2, 4])
+def test_coarse_matches_bfs_when_min_size_ge_stride(stride):
+    rng = np.random.default_rng(stride)
+    for _ in range(30):
+        frame = random_frame(rng, noise=0.002)
+        mask = match_mask(frame, TARGET, TOL)
+        blob = coarse_find_top_left_blob(frame, TARGET, TOL, 3, stride, 0, stride)
+        assert as_tuple(blob) == legacy_top_left(mask, 3, 0, stride)
+
+
+def test_coarse_finds_thin_part_above_earlier_candidate():
+    # 아래 후보의 blob 이 샘플 점 사이로 위쪽까지 가는 줄을 뻗음 -> 위쪽 후보보다 먼저여야 함
+    frame = np.zeros((200, 200, 4), dtype=np.uint8)
+    frame[40:61, 10:31, :3] = (0, 0, 255)
+    frame[100:131, 100:131, :3] = (0, 0, 255)
+    frame[5:100, 101, :3] = (0, 0, 255)
+    mask = match_mask(frame, TARGET, TOL)
+    blob = coarse_find_top_left_blob(frame, TARGET, TOL, 0, 8, 0, 8)
+    assert blob.top_left == (101, 5)
+    assert as_tuple(blob) == legacy_top_left(mask, 0, 0, 8)
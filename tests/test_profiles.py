@@ -0,0 +1,36 @@
+import json
+
+import pytest
+
+from profiles import ProfileStore
+
+# 프로필 저장/불러오기, 깨진 파일은 빈 저장소로
+
+
+def test_save_load_delete(tmp_path):
+    store = ProfileStore(str(tmp_path / "profiles.json"))
+    assert store.last is None and store.load() is None and store.names() == []
+    store.save("기본", {"tolerance": 40, "geometry": [1, 2, 900, 600]})
+    store.save("좌석A", {"tolerance": 20})
+    store.save("임시", {"tolerance": 5}, make_last=False)
+    assert store.names() == sorted(["기본", "좌석A", "임시"])
+    assert store.last == "좌석A"
+    assert store.load() == {"tolerance": 20}
+    assert store.load("기본")["geometry"] == [1, 2, 900, 600]
+    assert store.load("없음") is None
+
+    store.delete("좌석A")
+    assert store.last is None
+    assert store.names() == sorted(["기본", "임시"])
+    # 임시 파일 없이 교체됨
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["profiles.json"]
+
+
+@pytest.mark.parametrize("text", ["{깨짐", "[1, 2]", '{"profiles": [1]}'])
+def test_broken_file_reads_as_empty(tmp_path, text):
+    path = tmp_path / "profiles.json"
+    path.write_text(text, encoding="utf-8")
+    store = ProfileStore(str(path))
+    assert store.load() is None and store.names() == []
+    store.save("기본", {"tolerance": 40})
+    assert json.loads(path.read_text(encoding="utf-8"))["profiles"] == {"기본": {"tolerance": 40}}
@@ -0,0 +1,65 @@
+import time
+
+import numpy as np
+
+from recording import RecordingSource, SessionFile, SessionWriter
+
+# 녹화 -> 다시 읽기 왕복 (같은 화면 합치기, 크기가 다른 프레임 버리기, 잘린 파일)
+
+
+def _frame(value, h=12, w=20):
+    frame = np.full((h, w, 4), value, dtype=np.uint8)
+    frame[..., 3] = 255
+    frame[2, 3, :3] = (1, 2, 3)
+    return frame
+
+
+def test_session_round_trip(tmp_path):
+    path = str(tmp_path / "s.cprec")
+    region = {"left": 5, "top": 6, "width": 20, "height": 12}
+    writer = SessionWriter(path, region)
+    a, b = _frame(10), _frame(200)
+    writer.push(a, 100.0)
+    writer.push(a.copy(), 100.1)    # 같은 화면 -> 첫 레코드의 n 만 늘어남
+    writer.push(b, 100.25)
+    writer.push(_frame(7, h=8), 100.3)   # 크기가 다름 -> 버림
+    writer.close()
+    assert (writer.written, writer.skipped, writer.dropped) == (2, 1, 1)
+
+    rec = SessionFile(path)
+    assert len(rec) == 2
+    assert rec.region == region
+    assert rec.counts.tolist() == [2, 1]
+    assert np.allclose(rec.times, [0.0, 0.25])
+    assert np.array_equal(rec.frames[0], a[..., :3])
+    assert np.array_equal(rec.frames[1], b[..., :3])
+
+    src = RecordingSource(path)
+    assert np.array_equal(src.grab(), a)
+    assert np.array_equal(src.grab(), b)
+    assert src.grab() is None
+
+
+def test_truncated_record_is_ignored(tmp_path):
+    path = str(tmp_path / "s.cprec")
+    writer = SessionWriter(path)
+    writer.push(_frame(10), 0.0)
+    writer.push(_frame(20), 0.1)
+    writer.close()
+    with open(path, "r+b") as f:
+        f.truncate(f.seek(0, 2) - 5)
+    rec = SessionFile(path)
+    assert len(rec) == 1
+    assert rec.region == {"left": 0, "top": 0, "width": 20, "height": 12}
+
+
+def test_close_after_write_failure_does_not_block(tmp_path):
+    writer = SessionWriter(str(tmp_path / "없는 폴더" / "s.cprec"))
+    writer.push(_frame(10), 0.0)
+    writer._thread.join(2.0)
+    assert writer.failed
+    writer.push(_frame(10), 0.1)
+    assert writer.dropped == 1
+    t0 = time.perf_counter()
+    writer.close()
+    assert time.perf_counter() - t0 < 0.5
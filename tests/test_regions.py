@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+from detector import ColorRule
+from regions import MultiCapture, WatchRegion, parse_regions, plan_grabs, region_to_dict
+from sequence import Click, WaitFor
+
+# 캡처 계획(합치기/나누기), 영역별 view, 프로필 왕복
+
+
+def _rect(left, top, width, height):
+    return {"left": left, "top": top, "width": width, "height": height}
+
+
+def test_overlapping_regions_share_one_grab():
+    rects = [_rect(100, 100, 300, 200), _rect(300, 200, 300, 200), _rect(120, 120, 50, 50)]
+    plan = plan_grabs(rects)
+    assert len(plan) == 1
+    assert plan[0].rect == _rect(100, 100, 500, 300)
+    assert [(k, x, y) for k, x, y, _ in plan[0].members] == [(0, 0, 0), (1, 200, 100), (2, 20, 20)]
+
+
+def test_distant_regions_and_other_monitor_grab_separately():
+    monitors = [_rect(0, 0, 1920, 1080), _rect(1920, 0, 1920, 1080)]
+    rects = [_rect(0, 0, 100, 100), _rect(1700, 900, 100, 100),
+             _rect(1800, 0, 100, 100), _rect(1930, 0, 100, 100)]
+    plan = plan_grabs(rects, monitors, overhead=128 * 128)
+    # 0, 1 은 멀어서 따로 / 2, 3 은 붙어 있지만 모니터가 달라서 따로
+    assert sorted(tuple(k for k, *_ in g.members) for g in plan) == [(0,), (1,), (2,), (3,)]
+    # 비용이 줄면 같은 모니터 안에서는 합침
+    plan = plan_grabs(rects, monitors, overhead=1920 * 1080)
+    assert sorted(tuple(k for k, *_ in g.members) for g in plan) == [(0, 1, 2), (3,)]
+
+
+class _Source:
+    # 화면 좌표 = 픽셀 값 (y, x) 인 가짜 캡처
+    def __init__(self):
+        self.grabs = []
+
+    def grab(self, mon, timings=None):
+        self.grabs.append(dict(mon))
+        ys, xs = np.mgrid[mon["top"]:mon["top"] + mon["height"],
+                          mon["left"]:mon["left"] + mon["width"]]
+        frame = np.zeros((mon["height"], mon["width"], 4), dtype=np.int32)
+        frame[..., 0], frame[..., 1] = ys, xs
+        if timings is not None:
+            timings["capture_ms"] = 1.0
+        return frame
+
+
+def test_multi_capture_views_match_regions():
+    src = _Source()
+    multi = MultiCapture(src)
+    rects = [_rect(40, 10, 30, 20), _rect(10, 5, 30, 20), _rect(5000, 5000, 8, 8)]
+    multi.set_regions(rects, monitors=[])
+    timings = {}
+    frames = multi.grab(timings=timings)
+    assert len(src.grabs) == 2 and timings["grabs"] == 2 and timings["capture_ms"] == 2.0
+    assert [rf.index for rf in frames] == [0, 1, 2]
+    for rf, r in zip(frames, rects):
+        assert rf.mon == r
+        assert rf.frame.shape[:2] == (r["height"], r["width"])
+        assert (rf.frame[0, 0, 0], rf.frame[0, 0, 1]) == (r["top"], r["left"])
+    assert multi.pixels == sum(g["width"] * g["height"] for g in src.grabs[:2])
+
+
+def test_regions_profile_round_trip():
+    watches = [
+        WatchRegion("A구역", _rect(1, 2, 300, 200)),
+        WatchRegion("B구역", _rect(2020, 150, 500, 300), color=(0, 160, 255), tol=25,
+                    rules=[ColorRule((0, 200, 80), 30, (1200, 900), "초록"),
+                           ColorRule((10, 20, 30), 5)],
+                    steps=(Click((2400, 900), delay=0.05), WaitFor((1, 2, 3), timeout=1.0))),
+    ]
+    items = [region_to_dict(w) for w in watches]
+    assert parse_regions(items) == watches
+
+
+def test_duplicate_region_names_rejected():
+    with pytest.raises(ValueError):
+        parse_regions([{"name": "A", "region": _rect(0, 0, 1, 1)}] * 2)
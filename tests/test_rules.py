@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from detector import ColorRule, RuleSet, match_mask
+
+# LUT 한 번에 본 규칙별 결과가 규칙마다 따로 만든 match_mask 와 같아야 함
+
+
+def _frame(rng, colors, h=60, w=90):
+    # 규칙 색 근처 값(허용오차 경계 포함)이 섞인 화면
+    frame = rng.integers(0, 256, (h, w, 4), dtype=np.uint8)
+    for color in colors:
+        n = h * w // 8
+        ys, xs = rng.integers(0, h, n), rng.integers(0, w, n)
+        jitter = rng.integers(-45, 46, (n, 3))
+        bgr = np.clip(np.array(color[::-1]) + jitter, 0, 255)
+        frame[ys, xs, :3] = bgr
+    return frame
+
+
+@pytest.mark.parametrize("count", [1, 3, 9, 40])
+def test_ruleset_bits_match_per_rule_masks(count):
+    rng = np.random.default_rng(count)
+    rules = [ColorRule(tuple(int(c) for c in rng.integers(0, 256, 3)), int(rng.integers(0, 60)))
+             for _ in range(count)]
+    rs = RuleSet(rules)
+    for _ in range(5):
+        frame = _frame(rng, [r.color for r in rules])
+        bits = rs.match(frame)
+        maps = rs.hit_maps(bits)
+        for k, rule in enumerate(rules):
+            expect = match_mask(frame, rule.color, rule.tol)
+            got = (bits >> rs.dtype(k)) & 1 != 0
+            assert np.array_equal(got, expect), k
+            assert (k in rs.present(bits)) == bool(expect.any())
+            if expect.any():
+                assert np.array_equal(maps[k], expect)
+
+
+def test_ruleset_limits():
+    with pytest.raises(ValueError):
+        RuleSet([])
+    with pytest.raises(ValueError):
+        RuleSet([ColorRule((k, 0, 0), 0) for k in range(65)])
+    assert RuleSet([ColorRule((0, 0, 0), 0)] * 9).dtype == np.uint16
@@ -0,0 +1,65 @@
+import threading
+import time
+
+import pytest
+
+from scheduler import DeadlineTimer, PollScheduler, TickStats
+
+# 박자 계산은 시각을 직접 넣어서 확인 (실제로 기다리지 않음)
+
+
+def test_deadline_keeps_fixed_beat():
+    timer = DeadlineTimer(lambda: 0.1, start=10.0)
+    # 조금 늦게 처리해도 다음 deadline 은 이전 deadline + 주기 (늦은 만큼 밀리지 않음)
+    timer.fired(10.03)
+    assert timer.deadline == pytest.approx(10.1)
+    timer.fired(10.12)
+    assert timer.deadline == pytest.approx(10.2)
+    assert timer.stats.missed == 0
+
+
+def test_deadline_skips_missed_beats():
+    timer = DeadlineTimer(lambda: 0.1, start=10.0)
+    # 0.35 초 늦음 -> 10.1, 10.2, 10.3 박자는 건너뛰고 10.4 에 맞춤
+    timer.fired(10.35)
+    assert timer.deadline == pytest.approx(10.4)
+    assert timer.stats.missed == 3
+    summary = timer.stats.summary()
+    assert summary["ticks"] == 1
+    assert summary["late_p95_ms"] == pytest.approx(350)
+
+
+def test_tick_stats_period_and_jitter():
+    stats = TickStats()
+    for t in (0.0, 0.1, 0.3, 0.4):
+        stats.record(t, t)
+    summary = stats.summary()
+    assert summary["period_ms"] == pytest.approx(400 / 3)
+    # 주기 100, 200, 100 ms -> 표준편차 47.14 ms
+    assert summary["jitter_ms"] == pytest.approx(47.140, abs=1e-3)
+    assert summary["late_p95_ms"] == 0
+
+
+def test_poll_interval_modes():
+    sched = PollScheduler(lambda: 0.2, fast_for=5.0, idle_after=10.0)
+    now = time.perf_counter()
+    assert sched.current_interval(now) == pytest.approx(0.2)
+    sched.notify_refresh()
+    assert sched.current_interval(time.perf_counter()) == pytest.approx(0.1)
+    assert sched.mode == "fast"
+    # 빠른 감시가 끝나고 idle_after 동안 아무 일도 없으면 느리게
+    assert sched.current_interval(time.perf_counter() + 5.5) == pytest.approx(0.2)
+    assert sched.current_interval(time.perf_counter() + 11.0) == pytest.approx(0.4)
+
+
+def test_poll_next_orders_timers_and_stops():
+    sched = PollScheduler(lambda: 0.02)
+    sched.start()
+    stop = threading.Event()
+    assert sched.next(stop) == "detect"
+    sched.set_repeat(lambda: 10.0)
+    # 반복은 켜는 순간 한 번 누름 -> 다음 detect 보다 먼저
+    assert sched.next(stop) == "repeat"
+    assert sched.next(stop) == "detect"
+    stop.set()
+    assert sched.next(stop) is None
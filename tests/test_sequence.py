@@ -0,0 +1,37 @@
+import pytest
+
+from sequence import Click, WaitFor, parse_steps, step_to_dict
+
+# 단계 설정 파일 읽기/쓰기 왕복, 잘못된 항목은 ValueError
+
+
+def test_steps_round_trip():
+    steps = [
+        WaitFor((0, 200, 80), tol=25, region={"left": 1, "top": 2, "width": 30, "height": 40},
+                timeout=2.5, click=False, offset=(3, -4), interval=0.02, name="확인 버튼"),
+        Click((1200, 900), delay=0.1),
+        WaitFor((255, 0, 0)),
+    ]
+    items = [step_to_dict(s) for s in steps]
+    assert items[0]["wait"] == "#00c850"
+    assert parse_steps(items) == steps
+
+
+def test_parse_steps_accepts_color_list():
+    assert parse_steps([{"wait": [1, 2, 3]}]) == [WaitFor((1, 2, 3))]
+
+
+def test_template_step_is_not_saved():
+    with pytest.raises(ValueError):
+        step_to_dict(WaitFor(None, template=object()))
+
+
+@pytest.mark.parametrize("item", [
+    {"wait": "#ff0000", "tmeout": 2},
+    {"click": [1, 2], "dealy": 0.1},
+    {"wait": "#zz0000"},
+    {"tol": 30},
+])
+def test_parse_steps_rejects_bad_items(item):
+    with pytest.raises(ValueError):
+        parse_steps([item])
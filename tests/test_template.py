@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from template import TemplateMatcher, to_gray
+
+# 화면에 그대로 붙여 넣은 패치는 위치(축소 탐색의 s x s 칸 경계와의 위상)와 상관없이 항상 찾아야 함
+
+
+def _page(rng, height=450, width=800):
+    # 세로 줄무늬 배경 + 같은 빨강 배너 몇 개 (색만으로는 헷갈리는 화면)
+    frame = np.empty((height, width, 4), dtype=np.uint8)
+    frame[..., :3] = rng.integers(150, 230, (1, width, 3))
+    frame[..., 3] = 255
+    for _ in range(4):
+        y, x = int(rng.integers(0, height - 30)), int(rng.integers(0, width - 200))
+        frame[y:y + 30, x:x + 200, :3] = (0, 0, 255)
+    return frame
+
+
+def _button(rng, height, width):
+    # 빨간 버튼 + 흰 글자 획
+    patch = np.empty((height, width, 4), dtype=np.uint8)
+    patch[..., :3] = (0, 0, 255)
+    patch[..., 3] = 255
+    for _ in range(12):
+        y, x = int(rng.integers(4, height - 6)), int(rng.integers(4, width - 6))
+        patch[y:y + 2, x:x + int(rng.integers(2, 6)), :3] = 255
+    return patch
+
+
+@pytest.mark.parametrize("size,prefilter", [((32, 48), None), ((32, 32), "center"),
+                                            ((48, 64), None), ((48, 48), "center")])
+def test_pasted_patch_always_found(size, prefilter):
+    rng = np.random.default_rng(sum(size))
+    h, w = size
+    for py in range(4):
+        for px in range(4):
+            frame = _page(rng)
+            patch = _button(rng, h, w)
+            y = int(rng.integers(0, (450 - h) // 4)) * 4 + py
+            x = int(rng.integers(0, (800 - w) // 4)) * 4 + px
+            frame[y:y + h, x:x + w] = patch
+            matcher = TemplateMatcher(patch, prefilter=prefilter)
+            assert matcher.scale > 1
+            found = matcher.find(frame)
+            assert found is not None and found[:2] == (x, y), (py, px, found, matcher.last_score)
+
+
+def test_to_gray_matches_float_reference():
+    # 모든 채널이 255 근처일 때도 넘치지 않아야 함 (uint8 곱셈이면 0 근처로 떨어짐)
+    rng = np.random.default_rng(3)
+    frame = rng.integers(0, 256, (64, 64, 4), dtype=np.uint8)
+    frame[:8] = 255
+    f = frame.astype(np.float64)
+    ref = np.floor((29 * f[..., 0] + 150 * f[..., 1] + 77 * f[..., 2]) / 256)
+    gray = to_gray(frame)
+    assert gray.dtype == np.float32
+    assert np.array_equal(gray, ref)
@@ -0,0 +1,188 @@
+import queue
+import threading
+import time
+import traceback
+
+from scheduler import PollScheduler
+
+# =========================== 캡처/분석 파이프라인 ===========================
+# [캡처 스레드] --(최신 프레임 1장)--> [분석 스레드] --(상태 이벤트)--> Tk
+# 캡처는 interval 주기로 계속 돌고, 분석은 가장 최근 프레임만 처리한다.
+# -> N+1 번째 캡처가 N 번째 분석과 겹쳐서 진행됨.
+# 캡처 박자와 반복 클릭(새로고침)은 scheduler.PollScheduler 가 같은 스레드에서 관리.
+# Tk 쪽은 events 큐만 after() 로 읽어서 화면 갱신. 이벤트는 (종류, 값, run_id) 이고
+# run_id 는 start 할 때마다 1 씩 늘어남 -> 이전 감시의 늦은 이벤트(stopped 등)를 구분할 수 있음.
+# recorder(telemetry.TickRecorder) 를 주면 프레임마다 단계별 시간을 tick dict 로 모아서 기록.
+# 연속 감시: dedupe(continuous.FrameDeduper) 로 같은 화면은 분석 생략
+#            (incremental 엔진이면 분석은 하되 엔진의 타일 비교 결과로 같은 화면 표시),
+#            gate(continuous.TriggerGate) 로 같은 blob 에 대한 반복 클릭을 막는다.
+
+
+class DetectPipeline:
+    def __init__(self, capture, detect, on_hit, get_interval, ring=None, scheduler=None,
+                 recorder=None, timings=None, tape=None, dedupe=None, gate=None, settings=None):
+        self.capture = capture            # CaptureSession (여러 영역 감시면 regions.MultiCapture)
+        self.detect = detect              # detect(frame, mon) -> 인식 결과(engine.Detection) or None
+        # on_hit(hit, frame, mon, t_grab, tick) -> 계속 감시하면 True (tick 에 클릭 시간 기록 가능)
+        self.on_hit = on_hit
+        self.ring = ring                  # FrameRing (트리거 직전 프레임 보관, 선택)
+        self.recorder = recorder          # TickRecorder (선택)
+        self.timings = timings            # 방금 detect 의 단계별 시간 dict 를 주는 함수 (선택)
+        self.tape = tape                  # recording.SessionWriter (세션 녹화, 선택. 실행 중 교체 가능)
+        self.dedupe = dedupe              # FrameDeduper (선택)
+        self.gate = gate                  # TriggerGate (선택, 없으면 인식될 때마다 on_hit)
+        self.settings = settings          # 인식 설정 값을 주는 함수 (설정이 바뀌면 같은 화면도 다시 분석)
+        self.scheduler = scheduler or PollScheduler(get_interval)
+        self.on_repeat = None             # 반복 클릭 함수 (set_repeat 로 지정)
+        self.events = queue.Queue()       # Tk 로 보내는 (종류, 값, run_id) 이벤트
+        self.run_id = 0
+        self._frames = queue.Queue(maxsize=1)
+        self._stop = threading.Event()
+        self._threads = []
+
+    @property
+    def stop_event(self):
+        return self._stop
+
+    @property
+    def running(self):
+        return any(t.is_alive() for t in self._threads) and not self._stop.is_set()
+
+    def wait_stopped(self, timeout=2.0):
+        # 이전 스레드가 (현재 프레임 처리 후) 끝날 때까지 기다림. 끝났으면 True
+        self.stop()
+        self.join(timeout)
+        return not any(t.is_alive() for t in self._threads)
+
+    def start(self):
+        # 새 스레드 시작 (이미 돌고 있으면 그대로). 이전 스레드가 안 끝나면 시작 안 하고 False
+        # -> 분석 스레드가 둘이 되어 엔진 버퍼를 같이 쓰거나 둘 다 클릭하는 일이 없게
+        if self.running:
+            return True
+        if not self.wait_stopped():
+            return False
+        self.run_id += 1
+        if self.dedupe is not None:
+            self.dedupe.reset()
+        if self.gate is not None:
+            self.gate.reset()
+        self._stop = threading.Event()
+        self._frames = queue.Queue(maxsize=1)
+        self._threads = [
+            threading.Thread(target=self._capture_loop,
+                             args=(self._stop, self._frames, self.run_id),
+                             name="capture", daemon=True),
+            threading.Thread(target=self._detect_loop,
+                             args=(self._stop, self._frames, self.run_id),
+                             name="detect", daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+        return True
+
+    def stop(self):
+        # 즉시 반환. 스레드는 현재 프레임 처리 후(최대 1 프레임) 종료
+        self._stop.set()
+
+    def set_repeat(self, on_repeat, get_period):
+        # 반복 클릭 켜기 (캡처와 같은 박자 타임라인에서 실행). on_repeat=None 이면 끔
+        self.on_repeat = on_repeat
+        self.scheduler.set_repeat(get_period if on_repeat else None)
+
+    def join(self, timeout=None):
+        for t in self._threads:
+            if t is not threading.current_thread():
+                t.join(timeout)
+
+    # ---- 캡처 스레드 ----
+    def _capture_loop(self, stop, frames, run):
+        sched = self.scheduler
+        sched.start()
+        try:
+            while True:
+                kind = sched.next(stop)
+                if kind is None:
+                    break
+                if kind == "repeat":
+                    on_repeat = self.on_repeat
+                    # on_repeat 이 False 를 돌려주면 클릭을 건너뛴 것 (빠른 감시 안 함)
+                    if on_repeat is not None and on_repeat() is not False:
+                        sched.notify_refresh()
+                    continue
+                mon = self.capture.region
+                tick = {"t": time.time()} if self.recorder is not None else None
+                t_grab = time.perf_counter()
+                frame = self.capture.grab(mon) if tick is None else self.capture.grab(mon, tick)
+                if self.ring is not None:
+                    self.ring.push(frame, t_grab)
+                tape = self.tape
+                if tape is not None:
+                    tape.push(frame, t_grab)
+                item = (frame, mon, t_grab, tick)
+                # 분석이 밀리면 오래된 프레임은 버리고 최신 것만 유지
+                try:
+                    frames.put_nowait(item)
+                except queue.Full:
+                    try:
+                        frames.get_nowait()
+                    except queue.Empty:
+                        pass
+                    frames.put_nowait(item)
+        except Exception:
+            self._fail(stop, run)
+
+    # ---- 분석 스레드 ----
+    def _detect_loop(self, stop, frames, run):
+        last_hit = None
+        try:
+            while not stop.is_set():
+                try:
+                    frame, mon, t_grab, tick = frames.get(timeout=0.05)
+                except queue.Empty:
+                    continue
+                if stop.is_set():
+                    break
+                dedupe = self.dedupe
+                if dedupe is not None and dedupe.same(
+                        frame, (mon, self.settings() if self.settings else None)):
+                    # 화면 그대로 -> 지난 결과 재사용
+                    hit = last_hit
+                    if tick is not None:
+                        tick["hit"] = hit is not None
+                        tick["dup"] = True
+                else:
+                    t0 = time.perf_counter()
+                    hit = self.detect(frame, mon)
+                    unchanged = dedupe is not None and dedupe.after_detect()
+                    if tick is not None:
+                        tick["detect_ms"] = (time.perf_counter() - t0) * 1000
+                        tick["hit"] = hit is not None
+                        if unchanged:
+                            tick["dup"] = True
+                        if self.timings is not None:
+                            tick.update(self.timings())
+                last_hit = hit
+                gate = self.gate
+                fire = hit is not None if gate is None else gate.update(hit.pos if hit else None)
+                if not fire:
+                    self._record(tick)
+                    continue
+                self.scheduler.notify_activity()
+                keep = self.on_hit(hit, frame, mon, t_grab, tick)
+                self._record(tick)
+                self.events.put(("hit", hit, run))
+                if not keep:
+                    stop.set()
+        except Exception:
+            self._fail(stop, run)
+        finally:
+            if stop.is_set():
+                self.events.put(("stopped", None, run))
+
+    def _record(self, tick):
+        if tick is not None:
+            self.recorder.record(tick)
+
+    def _fail(self, stop, run):
+        stop.set()
+        self.events.put(("error", traceback.format_exc(), run))